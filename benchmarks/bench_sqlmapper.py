@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_sqlmapper.py
+#  PythonSQLMapper
+#
+#  Copyright 2013-2026 Kenji Nishishiro. All rights reserved.
+#  Written by Kenji Nishishiro <marvel@programmershigh.org>.
+#
+
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+from sqlmapper import LRUCache, Mapper
+
+BIND_COUNTS = (1, 5, 10, 25, 50)
+WIDTHS = (2, 10, 50)
+RESULT_TYPES = ("result", "class", "slots", "dataclass")
+ARRAY_SIZES = (1, 16, 100, 1000, "auto")
+DATABASES = ("memory", "file")
+
+
+def measure(function, operations, repeat):
+    function()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) / operations)
+    return {"operations": operations, "best": min(timings), "median": statistics.median(timings)}
+
+
+def result_type(kind, width):
+    names = [f"c{index}" for index in range(width)]
+    if kind == "result":
+        return None
+    elif kind == "class":
+        return type(f"Class{width}", (object,), dict.fromkeys(names))
+    elif kind == "slots":
+
+        def __init__(self):
+            for name in names:
+                setattr(self, name, None)
+
+        return type(f"Slots{width}", (object,), {"__slots__": tuple(names), "__init__": __init__})
+    else:
+        return dataclasses.make_dataclass(f"Dataclass{width}", [(name, int, None) for name in names])
+
+
+def rewrite_cases(mappers, loops):
+    mapper = mappers["memory"]
+    uncached = mappers["uncached"]
+    for binds in BIND_COUNTS:
+        sql = "SELECT " + ", ".join(f":p{index} AS p{index}" for index in range(binds))
+        parameter = {f"p{index}": index for index in range(binds)}
+        namespace = types.SimpleNamespace(**parameter)
+
+        def cold(sql=sql, parameter=parameter):
+            for _ in range(loops):
+                uncached.select_one(sql, parameter)
+
+        def cached(sql=sql, parameter=parameter):
+            for _ in range(loops):
+                mapper.select_one(sql, parameter)
+
+        def bind_object(sql=sql, namespace=namespace):
+            for _ in range(loops):
+                mapper.select_one(sql, namespace)
+
+        yield f"rewrite.cold[binds={binds}]", cold, loops
+        yield f"rewrite.cached[binds={binds}]", cached, loops
+        yield f"rewrite.bind_object[binds={binds}]", bind_object, loops
+
+
+def hydrate_cases(mappers, rows):
+    for width in WIDTHS:
+        sql = f"SELECT {', '.join(f'c{index}' for index in range(width))} FROM wide_{width}"
+        for rows_kind, mapper in (("dict", mappers["file"]), ("tuple", mappers["tuple"])):
+            for kind in RESULT_TYPES:
+                cls = result_type(kind, width)
+
+                def hydrate(mapper=mapper, sql=sql, cls=cls):
+                    for _ in mapper.select_all(sql, result_type=cls, array_size=1000):
+                        pass
+
+                yield f"hydrate[width={width},type={kind},rows={rows_kind}]", hydrate, rows
+
+
+def fetch_cases(mappers, rows):
+    for database in DATABASES:
+        mapper = mappers[database]
+        for array_size in ARRAY_SIZES:
+
+            def fetch(mapper=mapper, array_size=array_size):
+                for _ in mapper.select_all("SELECT id, name, value FROM items", array_size=array_size):
+                    pass
+
+            yield f"fetch[db={database},array_size={array_size}]", fetch, rows
+
+
+def write_cases(mappers, rows):
+    parameters = [{"name": f"name{index}", "value": index} for index in range(rows)]
+    for database in DATABASES:
+        mapper = mappers[database]
+
+        def insert_loop(mapper=mapper):
+            for parameter in parameters:
+                mapper.insert("INSERT INTO scratch (name, value) VALUES (:name, :value)", parameter)
+            mapper.rollback()
+
+        def insert_many(mapper=mapper):
+            mapper.insert_many("INSERT INTO scratch (name, value) VALUES (:name, :value)", parameters)
+            mapper.rollback()
+
+        def update_loop(mapper=mapper):
+            for index in range(1, rows + 1):
+                mapper.update("UPDATE items SET value = :value WHERE id = :id", {"id": index, "value": -index})
+            mapper.rollback()
+
+        yield f"write.insert_loop[db={database}]", insert_loop, rows
+        yield f"write.insert_many[db={database}]", insert_many, rows
+        yield f"write.update_loop[db={database}]", update_loop, rows
+
+
+def prepare(mapper, rows):
+    mapper.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL, value INTEGER NOT NULL)")
+    mapper.execute("CREATE TABLE scratch (id INTEGER PRIMARY KEY, name TEXT NOT NULL, value INTEGER NOT NULL)")
+    mapper.insert_many(
+        "INSERT INTO items (id, name, value) VALUES (:id, :name, :value)",
+        ({"id": index, "name": f"name{index}", "value": index} for index in range(1, rows + 1)),
+    )
+    for width in WIDTHS:
+        columns = [f"c{index}" for index in range(width)]
+        mapper.execute(f"CREATE TABLE wide_{width} ({', '.join(f'{name} INTEGER' for name in columns)})")
+        mapper.insert_many(
+            f"INSERT INTO wide_{width} VALUES ({', '.join(f':{name}' for name in columns)})",
+            ({name: index for name in columns} for index in range(rows)),
+        )
+    mapper.commit()
+
+
+def run(args):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="psm_bench_") as directory:
+        database = os.path.join(directory, "bench.db")
+        mappers = {
+            "memory": Mapper(sqlite3, database=":memory:"),
+            "file": Mapper(sqlite3, database=database),
+        }
+        try:
+            for mapper in mappers.values():
+                prepare(mapper, args.rows)
+            mappers["tuple"] = Mapper(sqlite3, tuple_rows=True, database=database)
+            mappers["uncached"] = Mapper(sqlite3, database=":memory:")
+            mappers["uncached"].statement_cache = LRUCache(max_size=0)
+            cases = [
+                rewrite_cases(mappers, args.loops),
+                hydrate_cases(mappers, args.rows),
+                fetch_cases(mappers, args.rows),
+                write_cases(mappers, args.rows),
+            ]
+            for group in cases:
+                for name, function, operations in group:
+                    if args.filter and args.filter not in name:
+                        continue
+                    results[name] = measure(function, operations, args.repeat)
+                    print(f"{name:<55} {results[name]['median'] * 1e6:>12.3f} us/op", file=sys.stderr)
+        finally:
+            for mapper in mappers.values():
+                mapper.close()
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "rows": args.rows,
+        "loops": args.loops,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    regressions = []
+    print(f"{'benchmark':<55} {'baseline':>12} {'current':>12} {'ratio':>8}", file=sys.stderr)
+    for name, result in report["results"].items():
+        if name not in baseline["results"]:
+            continue
+        previous = baseline["results"][name]["median"]
+        ratio = result["median"] / previous if previous else float("inf")
+        marker = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            marker = " REGRESSION"
+        print(
+            f"{name:<55} {previous * 1e6:>12.3f} {result['median'] * 1e6:>12.3f} {ratio:>8.2f}{marker}", file=sys.stderr
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for sqlmapper hot paths on sqlite3.")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--loops", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default=None)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}.", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,7 +8,24 @@
 #  Written by Kenji Nishishiro <marvel@programmershigh.org>.
 #
 
+import asyncio
+import dataclasses
+import heapq
+import io
+import queue
+import random
 import re
+import sys
+import threading
+import time
+import types
+from abc import ABCMeta
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import count, islice
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, Optional, Tuple, Type
 
 
 class MappingError(Exception):
@@ -55,49 +72,908 @@ class DriverNotSupportedError(DriverDatabaseError):
     pass
 
 
-class Result(object):
+class PoolTimeoutError(MappingError):
     pass
 
 
+class Result(object, metaclass=ABCMeta):
+    pass
+
+
+class LazyResult(object):
+    __slots__ = ("__values", "__index", "__dict__")
+    converters: Dict[str, Callable[[Any], Any]] = {}
+
+    def __init__(self, values=(), index=None):
+        self.__values = values
+        self.__index = {} if index is None else index
+
+    def __getattr__(self, name):
+        if name.startswith("_LazyResult__"):
+            raise AttributeError(name)
+        try:
+            value = self.__values[self.__index[name]]
+        except KeyError:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'") from None
+        converter = self.converters.get(name)
+        if converter is not None and value is not None:
+            value = converter(value)
+        self.__dict__[name] = value
+        return value
+
+    def __reduce__(self):
+        return (type(self), (self.__values, self.__index))
+
+
+class StatementEvent(object):
+    def __init__(self, sql, parameter_count):
+        self.sql = sql
+        self.parameter_count = parameter_count
+        self.rowcount = None
+        self.rows = 0
+        self.chunk_rows = 0
+        self.fetch_count = 0
+        self.execute_time = 0.0
+        self.fetch_time = 0.0
+        self.mapping_time = 0.0
+        self.error = None
+
+
+class StatementListener(object):
+    def before_execute(self, event):
+        pass
+
+    def after_execute(self, event):
+        pass
+
+    def after_fetch(self, event):
+        pass
+
+    def after_mapping(self, event):
+        pass
+
+    def error(self, event):
+        pass
+
+
+class FetchStats(object):
+    def __init__(self):
+        self.array_size = 0
+        self.max_array_size = 0
+        self.fetch_count = 0
+        self.row_count = 0
+        self.row_bytes = 0
+
+
+class PageCheckpoint(object):
+    def __init__(self, last_key=None):
+        self.last_key = last_key
+        self.page_size = 0
+        self.pages = 0
+        self.rows = 0
+
+
+class ResultMap(object):
+    def __init__(self, result_type=None, key="id", prefix="", collections=None, associations=None):
+        self.result_type = result_type
+        self.key = key
+        self.prefix = prefix
+        self.collections = collections or {}
+        self.associations = associations or {}
+
+
+class _ResultMapPlan(object):
+    def __init__(self, hydrate, positions, key_positions, collections, associations):
+        self.hydrate = hydrate
+        self.positions = positions
+        self.key_positions = key_positions
+        self.collections = collections
+        self.associations = associations
+
+    def key(self, values):
+        if len(self.key_positions) == 1:
+            return values[self.key_positions[0]]
+        key = tuple(values[position] for position in self.key_positions)
+        return None if all(value is None for value in key) else key
+
+    def assemble(self, values, seen):
+        key = self.key(values)
+        if key is None:
+            return None, False
+        node = seen.get(key)
+        created = node is None
+        if created:
+            result = self.hydrate([values[position] for position in self.positions])
+            children = {}
+            for name, _ in self.collections:
+                children[name] = ({}, [])
+                setattr(result, name, children[name][1])
+            for name, _ in self.associations:
+                children[name] = {}
+                setattr(result, name, None)
+            node = seen[key] = (result, children)
+        result, children = node
+        for name, plan in self.collections:
+            child_seen, items = children[name]
+            child, child_created = plan.assemble(values, child_seen)
+            if child_created:
+                items.append(child)
+        for name, plan in self.associations:
+            child, child_created = plan.assemble(values, children[name])
+            if child_created and getattr(result, name) is None:
+                setattr(result, name, child)
+        return result, created
+
+
+class LRUCache(object):
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key, factory):
+        with self.__lock:
+            try:
+                value = self.__entries[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return value
+        value = factory()
+        with self.__lock:
+            self.__entries[key] = value
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self.__entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class _SlottedResult(object):
+    __slots__ = ()
+    __names__ = ()
+    __classes = LRUCache()
+
+    @classmethod
+    def supports(cls, names):
+        return len(set(names)) == len(names) and all(
+            name.isidentifier() and not name.startswith("__") for name in names
+        )
+
+    @classmethod
+    def for_names(cls, names):
+        return cls.__classes.get(names, lambda: cls.__create(names))
+
+    @classmethod
+    def restore(cls, names, values):
+        result = cls.for_names(names)()
+        for name, value in zip(names, values):
+            setattr(result, name, value)
+        return result
+
+    @classmethod
+    def __create(cls, names):
+        result_type = type("Result", (cls,), {"__slots__": names, "__names__": names})
+        Result.register(result_type)
+        return result_type
+
+    def __reduce__(self):
+        return (_SlottedResult.restore, (self.__names__, tuple(getattr(self, name) for name in self.__names__)))
+
+
+class ResultCache(object):
+    __identifier = r"[`\"\[]?[\w$]+[`\"\]]?(?:\.[`\"\[]?[\w$]+[`\"\]]?)?"
+    __from_tables = re.compile(
+        rf"\b(?:FROM|USING)\s+({__identifier}(?:\s+(?:AS\s+)?\w+)?(?:\s*,\s*{__identifier}(?:\s+(?:AS\s+)?\w+)?)*)",
+        re.IGNORECASE,
+    )
+    __join_tables = re.compile(rf"\bJOIN\s+({__identifier})", re.IGNORECASE)
+    __write_tables = re.compile(
+        r"^\s*(?:(INSERT(?:\s+OR\s+\w+)?(?:\s+IGNORE)?\s+INTO|REPLACE\s+INTO|MERGE\s+INTO|COPY|TRUNCATE(?:\s+TABLE)?"
+        r"|(?:ALTER|DROP|CREATE)(?:\s+TEMP|\s+TEMPORARY)?\s+TABLE(?:\s+IF(?:\s+NOT)?\s+EXISTS)?)"
+        r"|(UPDATE(?:\s+OR\s+\w+)?(?:\s+LOW_PRIORITY|\s+IGNORE)*|DELETE(?:\s+LOW_PRIORITY|\s+QUICK|\s+IGNORE)*\s+FROM))"
+        rf"\s+({__identifier})",
+        re.IGNORECASE,
+    )
+
+    def __init__(self, max_size=1024, max_bytes=64 * 1024 * 1024, ttl=60.0):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.__entries = OrderedDict()
+        self.__tags = {}
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self.__remove(key)
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, names, rows, tags, size):
+        if size > self.max_bytes:
+            return
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self.__lock:
+            if key in self.__entries:
+                self.__remove(key)
+            self.__entries[key] = _CachedResult(names, rows, tags, expires_at, size)
+            self.__bytes += size
+            for tag in tags:
+                self.__tags.setdefault(tag, set()).add(key)
+            while len(self.__entries) > self.max_size or self.__bytes > self.max_bytes:
+                self.__remove(next(iter(self.__entries)))
+                self.evictions += 1
+
+    def invalidate(self, tags=None):
+        with self.__lock:
+            if tags is None:
+                keys = list(self.__entries)
+            else:
+                keys = set()
+                for tag in tags:
+                    keys.update(self.__tags.get(self.normalize_tag(tag), ()))
+            for key in keys:
+                self.__remove(key)
+            self.invalidations += len(keys)
+
+    def clear(self):
+        self.invalidate()
+
+    def stats(self):
+        return {
+            "size": len(self.__entries),
+            "bytes": self.__bytes,
+            "max_size": self.max_size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    @classmethod
+    def read_tags(cls, sql):
+        tags = set()
+        for match in cls.__from_tables.finditer(sql):
+            for item in match.group(1).split(","):
+                tags.add(cls.normalize_tag(item.split()[0]))
+        for match in cls.__join_tables.finditer(sql):
+            tags.add(cls.normalize_tag(match.group(1)))
+        return frozenset(tags)
+
+    @classmethod
+    def write_tags(cls, sql):
+        match = cls.__write_tables.match(sql)
+        if match is None:
+            return None
+        tags = {cls.normalize_tag(match.group(3))}
+        if match.group(2) is not None:
+            tags.update(cls.read_tags(sql))
+        return frozenset(tags)
+
+    @staticmethod
+    def normalize_tag(name):
+        return name.strip('`"[]').rsplit(".", 1)[-1].strip('`"[]').lower()
+
+    def __remove(self, key):
+        entry = self.__entries.pop(key)
+        self.__bytes -= entry.size
+        for tag in entry.tags:
+            keys = self.__tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.__tags[tag]
+
+
+class _CachedResult(object):
+    __slots__ = ("names", "rows", "tags", "expires_at", "size")
+
+    def __init__(self, names, rows, tags, expires_at, size):
+        self.names = names
+        self.rows = rows
+        self.tags = tags
+        self.expires_at = expires_at
+        self.size = size
+
+
+class Statement(object):
+    __bind_variable = re.compile(r"(?<!:):([a-zA-Z_][a-zA-Z0-9_]*)(\*(?=[,)]))?")
+
+    def __init__(self, sql, place_holder):
+        fragments = []
+        names = []
+        expanded = []
+        start = 0
+        for match in self.__bind_variable.finditer(sql):
+            fragments.append(sql[start : match.start()])
+            names.append(match.group(1))
+            expanded.append(match.group(2) is not None)
+            start = match.end()
+        fragments.append(sql[start:])
+        self.fragments = tuple(fragments)
+        self.names = tuple(names)
+        self.expanded = tuple(expanded)
+        self.expands = any(expanded)
+        self.place_holder = place_holder
+        self.sql = place_holder.join(fragments)
+        self.__shapes = {}
+        if len(names) == 0:
+            self.__get_items = self.__get_attrs = self.__get_nothing
+        elif len(names) == 1:
+            get_item = itemgetter(names[0])
+            get_attr = attrgetter(names[0])
+            self.__get_items = lambda parameter: (get_item(parameter),)
+            self.__get_attrs = lambda parameter: (get_attr(parameter),)
+        else:
+            self.__get_items = itemgetter(*names)
+            self.__get_attrs = attrgetter(*names)
+
+    def bind(self, parameter):
+        if isinstance(parameter, dict):
+            try:
+                return self.__get_items(parameter)
+            except KeyError:
+                pass
+        else:
+            try:
+                return self.__get_attrs(parameter)
+            except AttributeError:
+                pass
+        return tuple(self.get_variable(parameter, name) for name in self.names)
+
+    def expand(self, values):
+        shape = tuple(
+            self.__bucket(name, value) if expanded else None
+            for name, expanded, value in zip(self.names, self.expanded, values)
+        )
+        statement = self.__shapes.get(shape)
+        if statement is None:
+            parts = [self.fragments[0]]
+            for name, size, fragment in zip(self.names, shape, self.fragments[1:]):
+                if size is None:
+                    parts.append(f":{name}")
+                else:
+                    parts.append(", ".join(f":{name}__{index}" for index in range(size)))
+                parts.append(fragment)
+            statement = self.__shapes[shape] = Statement("".join(parts), self.place_holder)
+        expanded = []
+        for size, value in zip(shape, values):
+            if size is None:
+                expanded.append(value)
+            else:
+                expanded.extend(value)
+                expanded.extend(value[-1:] * (size - len(value)))
+        return statement, tuple(expanded)
+
+    @staticmethod
+    def __bucket(name, value):
+        if not isinstance(value, (list, tuple)):
+            raise MappingError(
+                f"Bind variable '{name}*' must be bound to a list or tuple, but got '{type(value).__name__}'."
+            )
+        elif not value:
+            raise MappingError(f"Bind variable '{name}' is bound to an empty sequence.")
+        return 1 << (len(value) - 1).bit_length()
+
+    @staticmethod
+    def __get_nothing(parameter):
+        return ()
+
+    @staticmethod
+    def get_variable(parameter, name):
+        if isinstance(parameter, dict):
+            try:
+                return parameter[name]
+            except KeyError:
+                raise MappingError(
+                    f"Bind variable '{name}' was not found in dict parameter. Available keys: {sorted(parameter.keys())}"
+                )
+        else:
+            try:
+                return getattr(parameter, name)
+            except AttributeError:
+                raise MappingError(
+                    f"Bind variable '{name}' was not found in parameter object of type '{type(parameter).__name__}'."
+                )
+
+
+class Dialect(object):
+    driver_name: Optional[str] = None
+    place_holder = "%s"
+    server_side_cursors = False
+    max_parameters = 65535
+    retryable_codes: Tuple[Any, ...] = ()
+    prepared_mode: Optional[str] = None
+    __dialects: Dict[str, Type["Dialect"]] = OrderedDict()
+
+    def __init__(self, driver, tuple_rows):
+        self.driver = driver
+        self.tuple_rows = tuple_rows
+        self.cursor_params = {}
+        self.buffered_cursor_params = self.cursor_params
+        self.prepared_cursor_params = None
+
+    @classmethod
+    def register(cls, dialect):
+        cls.__dialects[dialect.driver_name] = dialect
+        return dialect
+
+    @classmethod
+    def for_driver(cls, driver, tuple_rows):
+        try:
+            dialect = cls.__dialects[driver.__name__]
+        except KeyError:
+            raise MappingError(
+                f"Unsupported driver '{driver.__name__}'. Supported drivers: {', '.join(cls.__dialects)}."
+            )
+        return dialect(driver, tuple_rows)
+
+    @classmethod
+    def prepared_drivers(cls):
+        return [name for name, dialect in cls.__dialects.items() if dialect.prepared_mode is not None]
+
+    def connect(self, params, prepared_statements):
+        return self.driver.connect(**params)
+
+    def server_side_cursor(self, connection, name, array_size):
+        cursor = connection.cursor(name, withhold=connection.autocommit, **self.cursor_params)
+        cursor.itersize = array_size
+        return cursor
+
+    def tuple_cursor(self, cursor):
+        return cursor
+
+    def executemany(self, cursor, sql, batch):
+        cursor.executemany(sql, batch)
+
+    def lastrowid(self, cursor):
+        return cursor.lastrowid
+
+    def copy_in(self, cursor, sql, rows):
+        raise MappingError(f"COPY is not supported for driver '{self.driver.__name__}'.")
+
+    def copy_out(self, cursor, sql, values):
+        raise MappingError(f"COPY is not supported for driver '{self.driver.__name__}'.")
+
+    def copy_out_rows(self, cursor, sql, values, type_codes):
+        raise MappingError(f"COPY is not supported for driver '{self.driver.__name__}'.")
+
+    def modulo(self, expression, divisor):
+        return f"MOD({expression}, {divisor})"
+
+    def interrupt(self, connection):
+        interrupt = getattr(connection, "cancel", None) or getattr(connection, "interrupt", None)
+        if interrupt is not None:
+            try:
+                interrupt()
+            except Exception:
+                pass
+
+    def error_code(self, error):
+        return None
+
+    def is_retryable(self, error):
+        return isinstance(error, self.driver.Error) and self.error_code(error) in self.retryable_codes
+
+    def map_error(self, error):
+        if isinstance(error, self.driver.NotSupportedError):
+            return DriverNotSupportedError(*error.args)
+        elif isinstance(error, self.driver.ProgrammingError):
+            return DriverProgrammingError(*error.args)
+        elif isinstance(error, self.driver.InternalError):
+            return DriverInternalError(*error.args)
+        elif isinstance(error, self.driver.IntegrityError):
+            return DriverIntegrityError(*error.args)
+        elif isinstance(error, self.driver.OperationalError):
+            return DriverOperationalError(*error.args)
+        elif isinstance(error, self.driver.DataError):
+            return DriverDataError(*error.args)
+        elif isinstance(error, self.driver.DatabaseError):
+            return DriverDatabaseError(*error.args)
+        elif isinstance(error, self.driver.InterfaceError):
+            return DriverInterfaceError(*error.args)
+        elif isinstance(error, self.driver.Error):
+            return DriverError(*error.args)
+        elif isinstance(error, self.driver.Warning):
+            return DriverWarning(*error.args)
+        else:
+            return None
+
+
+@Dialect.register
+class SQLite3Dialect(Dialect):
+    driver_name = "sqlite3"
+    place_holder = "?"
+    prepared_mode = "cache"
+    max_parameters = 999
+
+    def connect(self, params, prepared_statements):
+        if prepared_statements:
+            params = dict(params)
+            params.setdefault("cached_statements", prepared_statements)
+        connection = self.driver.connect(**params)
+        if not self.tuple_rows:
+            connection.row_factory = self.__dict_row_factory
+        return connection
+
+    def modulo(self, expression, divisor):
+        return f"({expression} % {divisor})"
+
+    def tuple_cursor(self, cursor):
+        cursor.row_factory = None
+        return cursor
+
+    def is_retryable(self, error):
+        if not isinstance(error, self.driver.OperationalError):
+            return False
+        code = getattr(error, "sqlite_errorcode", None)
+        if code is None:
+            return "locked" in str(error)
+        return code & 0xFF in (self.driver.SQLITE_BUSY, self.driver.SQLITE_LOCKED)
+
+    @staticmethod
+    def __dict_row_factory(cursor, row):
+        fields = [column[0] for column in cursor.description]
+        return {key: value for key, value in zip(fields, row)}
+
+
+@Dialect.register
+class MySQLConnectorDialect(Dialect):
+    driver_name = "mysql.connector"
+    prepared_mode = "cursor"
+    retryable_codes = (1205, 1213)
+
+    def __init__(self, driver, tuple_rows):
+        super().__init__(driver, tuple_rows)
+        if self.tuple_rows:
+            self.cursor_params = {}
+            self.buffered_cursor_params = {"buffered": True}
+        else:
+            self.cursor_params = {"dictionary": True}
+            self.buffered_cursor_params = {"dictionary": True, "buffered": True}
+        self.prepared_cursor_params = dict(self.cursor_params, prepared=True)
+
+    def error_code(self, error):
+        return getattr(error, "errno", None)
+
+
+@Dialect.register
+class MySQLdbDialect(Dialect):
+    driver_name = "MySQLdb"
+    retryable_codes = (1205, 1213)
+
+    def __init__(self, driver, tuple_rows):
+        import MySQLdb.cursors
+
+        super().__init__(driver, tuple_rows)
+        if self.tuple_rows:
+            self.cursor_params = {"cursorclass": MySQLdb.cursors.SSCursor}
+            self.buffered_cursor_params = {"cursorclass": MySQLdb.cursors.Cursor}
+        else:
+            self.cursor_params = {"cursorclass": MySQLdb.cursors.SSDictCursor}
+            self.buffered_cursor_params = {"cursorclass": MySQLdb.cursors.DictCursor}
+
+    def error_code(self, error):
+        return error.args[0] if error.args else None
+
+
+@Dialect.register
+class PyMySQLDialect(Dialect):
+    driver_name = "pymysql"
+    retryable_codes = (1205, 1213)
+
+    def __init__(self, driver, tuple_rows):
+        import pymysql.cursors
+
+        super().__init__(driver, tuple_rows)
+        if self.tuple_rows:
+            self.cursor_params = {"cursor": pymysql.cursors.SSCursor}
+            self.buffered_cursor_params = {"cursor": pymysql.cursors.Cursor}
+        else:
+            self.cursor_params = {"cursor": pymysql.cursors.SSDictCursor}
+            self.buffered_cursor_params = {"cursor": pymysql.cursors.DictCursor}
+
+    def error_code(self, error):
+        return error.args[0] if error.args else None
+
+
+@Dialect.register
+class Psycopg2Dialect(Dialect):
+    driver_name = "psycopg2"
+    server_side_cursors = True
+    prepared_mode = "statement"
+    retryable_codes = ("40001", "40P01")
+
+    def __init__(self, driver, tuple_rows):
+        import psycopg2.extensions
+        import psycopg2.extras
+
+        super().__init__(driver, tuple_rows)
+        if not self.tuple_rows:
+            self.cursor_params = {"cursor_factory": psycopg2.extras.RealDictCursor}
+        self.buffered_cursor_params = self.cursor_params
+        self.string_types = psycopg2.extensions.string_types
+
+    def error_code(self, error):
+        return getattr(error, "pgcode", None)
+
+    def copy_in(self, cursor, sql, rows):
+        stream = _CopyInStream(rows)
+        cursor.copy_expert(f"{sql} WITH (FORMAT csv)", stream)
+        return stream.count
+
+    def copy_out(self, cursor, sql, values):
+        savepoint = not cursor.connection.autocommit
+        if savepoint:
+            cursor.execute("SAVEPOINT sqlmapper_copy_out")
+        stream = _CopyOutStream()
+        worker = threading.Thread(target=stream.run, args=(cursor.copy_expert, cursor.mogrify(sql, values)))
+        worker.start()
+        completed = False
+        try:
+            for chunk in stream:
+                yield chunk
+            completed = True
+        finally:
+            if not completed and worker.is_alive():
+                cursor.connection.cancel()
+            stream.discard()
+            worker.join()
+            if savepoint:
+                cursor.execute(f"{'RELEASE' if completed else 'ROLLBACK TO'} SAVEPOINT sqlmapper_copy_out")
+
+    def copy_out_rows(self, cursor, sql, values, type_codes):
+        casts = [self.string_types.get(type_code) for type_code in type_codes]
+        chunks = self.copy_out(cursor, sql, values)
+        try:
+            for row in _CopyOutStream.rows(chunks):
+                yield tuple(
+                    value if value is None or cast is None else cast(value, cursor) for cast, value in zip(casts, row)
+                )
+        finally:
+            chunks.close()
+
+
+@Dialect.register
+class PsycopgDialect(Dialect):
+    driver_name = "psycopg"
+    server_side_cursors = True
+    prepared_mode = "cache"
+    retryable_codes = ("40001", "40P01")
+
+    def __init__(self, driver, tuple_rows):
+        import psycopg.rows
+
+        super().__init__(driver, tuple_rows)
+        if not self.tuple_rows:
+            self.cursor_params = {"row_factory": psycopg.rows.dict_row}
+        self.buffered_cursor_params = self.cursor_params
+
+    def connect(self, params, prepared_statements):
+        connection = self.driver.connect(**params)
+        if prepared_statements:
+            connection.prepare_threshold = 0
+            connection.prepared_max = prepared_statements
+        return connection
+
+    def executemany(self, cursor, sql, batch):
+        with cursor.connection.pipeline():
+            cursor.executemany(sql, batch)
+
+    def lastrowid(self, cursor):
+        return None
+
+    def error_code(self, error):
+        return getattr(error, "sqlstate", None)
+
+    def copy_in(self, cursor, sql, rows):
+        count = 0
+        with cursor.copy(sql) as copy:
+            for row in rows:
+                copy.write_row(row)
+                count += 1
+        return count
+
+    def copy_out(self, cursor, sql, values):
+        encoding = cursor.connection.info.encoding
+        for data in self.__copy_out(cursor, sql, values, None):
+            yield bytes(data).decode(encoding)
+
+    def copy_out_rows(self, cursor, sql, values, type_codes):
+        return self.__copy_out(cursor, sql, values, type_codes)
+
+    @staticmethod
+    def __copy_out(cursor, sql, values, type_codes):
+        savepoint = not cursor.connection.autocommit
+        if savepoint:
+            cursor.execute("SAVEPOINT sqlmapper_copy_out")
+        completed = False
+        try:
+            with cursor.copy(sql, values) as copy:
+                if type_codes is None:
+                    yield from copy
+                else:
+                    copy.set_types(type_codes)
+                    yield from copy.rows()
+            completed = True
+        finally:
+            if savepoint:
+                cursor.execute(f"{'RELEASE' if completed else 'ROLLBACK TO'} SAVEPOINT sqlmapper_copy_out")
+
+
+class _CopyInStream(object):
+    def __init__(self, rows, size=65536):
+        self.count = 0
+        self.__rows = iter(rows)
+        self.__size = size
+        self.__buffer = ""
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.__size
+        lines = [self.__buffer]
+        length = len(self.__buffer)
+        for row in self.__rows:
+            line = ",".join(map(self.__field, row)) + "\n"
+            lines.append(line)
+            length += len(line)
+            self.count += 1
+            if length >= size:
+                break
+        data = "".join(lines)
+        self.__buffer = data[size:]
+        return data[:size]
+
+    @staticmethod
+    def __field(value):
+        if value is None:
+            return ""
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            value = "\\x" + bytes(value).hex()
+        else:
+            value = str(value)
+        return '"' + value.replace('"', '""') + '"'
+
+
+class _CopyOutStream(io.TextIOBase):
+    __escape = re.compile(r"\\(.)")
+    __escapes = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}
+
+    def __init__(self, max_chunks=16):
+        super().__init__()
+        self.__chunks = queue.Queue(max_chunks)
+        self.__discarding = False
+        self.__finished = False
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if not self.__discarding:
+            self.__chunks.put(data)
+        return len(data)
+
+    def run(self, copy_expert, sql):
+        try:
+            copy_expert(sql, self)
+        except BaseException as error:
+            self.__chunks.put(error)
+        else:
+            self.__chunks.put(None)
+
+    def __iter__(self):
+        while not self.__finished:
+            chunk = self.__chunks.get()
+            if chunk is None:
+                self.__finished = True
+            elif isinstance(chunk, BaseException):
+                self.__finished = True
+                raise chunk
+            else:
+                yield chunk
+
+    def discard(self):
+        self.__discarding = True
+        while not self.__finished:
+            chunk = self.__chunks.get()
+            if chunk is None or isinstance(chunk, BaseException):
+                self.__finished = True
+
+    @classmethod
+    def rows(cls, chunks):
+        pending = ""
+        for chunk in chunks:
+            lines = (pending + chunk).split("\n")
+            pending = lines.pop()
+            for line in lines:
+                yield tuple(
+                    None if field == "\\N" else cls.__escape.sub(cls.__unescape, field) for field in line.split("\t")
+                )
+
+    @classmethod
+    def __unescape(cls, match):
+        return cls.__escapes.get(match.group(1), match.group(1))
+
+
 class Mapper(object):
-    def __init__(self, driver, **params):
+    statement_cache = LRUCache()
+    hydrator_cache = LRUCache()
+    fetch_memory_budget = 8 * 1024 * 1024
+    initial_fetch_size = 16
+    max_fetch_size = 10000
+    initial_page_size = 100
+    max_page_size = 10000
+    page_time_target = 0.5
+    max_prepared_statements = 256
+    __cursor_names = count()
+    __preparable = re.compile(r"\s*(?:SELECT|INSERT|UPDATE|DELETE|REPLACE|VALUES|WITH)\b", re.IGNORECASE)
+    __declarable = re.compile(r"[\s(]*(?:SELECT|VALUES|TABLE)\b", re.IGNORECASE)
+
+    def __init__(self, driver, *, tuple_rows=False, result_cache=None, prepared=False, reuse_cursors=False, **params):
         self.driver = driver
         self.connection = None
+        self.tuple_rows = tuple_rows
+        self.result_cache = result_cache
+        self.prepared = prepared
+        self.reuse_cursors = reuse_cursors
+        self.__listeners = ()
+        self.__dirty_tags = set()
+        self.__prepared_statements = OrderedDict()
+        self.__prepared_checkouts = {}
+        self.__prepared_counts = {"hits": 0, "misses": 0, "evictions": 0}
+        self.__idle_cursors = {}
+        self.__cursor_checkouts = {}
+        self.__copying = False
 
-        if self.driver.__name__ == "sqlite3":
-            self.__cursor_params = {}
-            self.__buffered_cursor_params = self.__cursor_params
-            self.__place_holder = "?"
-        elif self.driver.__name__ == "mysql.connector":
-            self.__cursor_params = {"dictionary": True}
-            self.__buffered_cursor_params = {"dictionary": True, "buffered": True}
-            self.__place_holder = "%s"
-        elif self.driver.__name__ == "MySQLdb":
-            import MySQLdb.cursors
-
-            self.__cursor_params = {"cursorclass": MySQLdb.cursors.SSDictCursor}
-            self.__buffered_cursor_params = {"cursorclass": MySQLdb.cursors.DictCursor}
-            self.__place_holder = "%s"
-        elif self.driver.__name__ == "pymysql":
-            import pymysql.cursors
-
-            self.__cursor_params = {"cursor": pymysql.cursors.SSDictCursor}
-            self.__buffered_cursor_params = {"cursor": pymysql.cursors.DictCursor}
-            self.__place_holder = "%s"
-        elif self.driver.__name__ == "psycopg2":
-            import psycopg2.extras
-
-            self.__cursor_params = {"cursor_factory": psycopg2.extras.RealDictCursor}
-            self.__buffered_cursor_params = self.__cursor_params
-            self.__place_holder = "%s"
-        else:
+        self.dialect = Dialect.for_driver(driver, tuple_rows)
+        self.__tuple_dialect = self.dialect if tuple_rows else Dialect.for_driver(driver, True)
+        if self.prepared and self.dialect.prepared_mode is None:
             raise MappingError(
-                f"Unsupported driver '{self.driver.__name__}'. Supported drivers: sqlite3, mysql.connector, "
-                "MySQLdb, pymysql, psycopg2."
+                f"Prepared statements are not supported for driver '{self.driver.__name__}'. Supported drivers: "
+                f"{', '.join(Dialect.prepared_drivers())}."
             )
 
         try:
-            self.connection = self.driver.connect(**params)
+            self.connection = self.dialect.connect(params, self.max_prepared_statements if self.prepared else 0)
         except Exception as error:
             mapped = self.__map_driver_error(error)
             if mapped is not None:
@@ -105,12 +981,12 @@ class Mapper(object):
             else:
                 raise
 
-        if self.driver.__name__ == "sqlite3":
-            self.connection.row_factory = self.__sqlite3_dict_row_factory
-
     def close(self):
         try:
             if self.connection is not None:
+                self.__check_copying()
+                self.__clear_idle_cursors()
+                self.__clear_prepared_statements()
                 self.connection.close()
                 self.connection = None
         except Exception as error:
@@ -129,20 +1005,37 @@ class Mapper(object):
     def __exit__(self, exc_type, exc_value, traceback):
         self.close()
 
-    def select_one(self, sql, parameter=None, result_type=None):
+    def select_one(self, sql, parameter=None, result_type=None, cache=False):
         try:
-            cursor = self.connection.cursor(**self.__cursor_params)
+            cache_key = None
+            if cache and self.result_cache is not None:
+                cache_key, cache_tags, cached = self.__cache_lookup(sql, parameter, cache)
+                if cached is not None:
+                    if not cached.rows:
+                        return None
+                    return self.__hydrator(result_type, cached.names)(cached.rows[0])
+            cursor = self.__cursor(sql)
+            reusable = False
             try:
-                cursor.execute(*self.__map_parameter(sql, parameter))
-                rows = cursor.fetchmany(2)
+                event = self.__execute(cursor, sql, parameter)
+                rows = self.__fetchmany(cursor, 2, event)
+                reusable = len(rows) < 2
+                if cache_key is not None and len(rows) < 2:
+                    self.__cache_store(cache_key, cache_tags, cursor, rows, self.__rows_size(rows))
                 if len(rows) == 0:
                     return None
                 elif len(rows) == 1:
-                    return self.__create_result(row=rows[0], result_type=result_type)
+                    hydrate = self.__row_hydrator(cursor, rows[0], result_type)
+                    if event is None:
+                        return hydrate(rows[0])
+                    else:
+                        result = self.__map_rows(hydrate, rows, event)[0]
+                        self.__notify("after_mapping", event)
+                        return result
                 else:
                     raise MappingError("Expected exactly one row, but multiple rows were returned.")
             finally:
-                cursor.close()
+                self.__release_cursor(cursor, reusable)
         except Exception as error:
             mapped = self.__map_driver_error(error)
             if mapped is not None:
@@ -152,21 +1045,57 @@ class Mapper(object):
 
     returning_one = select_one
 
-    def select_all(self, sql, parameter=None, result_type=None, array_size=1, buffered=True):
+    def select_all(self, sql, parameter=None, result_type=None, array_size=1, buffered=True, stats=None, cache=False):
         try:
-            if buffered:
-                cursor = self.connection.cursor(**self.__buffered_cursor_params)
-            else:
-                cursor = self.connection.cursor(**self.__cursor_params)
+            collected = cache_key = None
+            if cache and self.result_cache is not None:
+                cache_key, cache_tags, cached = self.__cache_lookup(sql, parameter, cache)
+                if cached is not None:
+                    if cached.rows:
+                        hydrate = self.__hydrator(result_type, cached.names)
+                        for row in cached.rows:
+                            yield hydrate(row)
+                    return
+                if cache_key is not None:
+                    collected = []
+                    collected_bytes = 0
+            adaptive = array_size == "auto"
+            if adaptive:
+                array_size = self.initial_fetch_size
+            cursor = self.__select_cursor(sql, buffered, array_size)
+            reusable = False
             try:
-                cursor.execute(*self.__map_parameter(sql, parameter))
-                rows = cursor.fetchmany(array_size)
+                event = self.__execute(cursor, sql, parameter)
+                rows = self.__fetchmany(cursor, array_size, event)
+                if stats is not None:
+                    self.__record_fetch(stats, array_size, rows)
+                if rows:
+                    hydrate = self.__row_hydrator(cursor, rows[0], result_type)
                 while rows:
-                    for row in rows:
-                        yield self.__create_result(row=row, result_type=result_type)
-                    rows = cursor.fetchmany(array_size)
+                    if collected is not None:
+                        collected_bytes += self.__rows_size(rows)
+                        if collected_bytes <= self.result_cache.max_bytes:
+                            collected.extend(rows)
+                        else:
+                            collected = None
+                    if event is None:
+                        for row in rows:
+                            yield hydrate(row)
+                    else:
+                        for result in self.__map_rows(hydrate, rows, event):
+                            yield result
+                    if adaptive:
+                        array_size = self.__next_fetch_size(array_size, rows, stats)
+                    rows = self.__fetchmany(cursor, array_size, event)
+                    if stats is not None:
+                        self.__record_fetch(stats, array_size, rows)
+                reusable = True
+                if collected is not None:
+                    self.__cache_store(cache_key, cache_tags, cursor, collected, collected_bytes)
+                if event is not None:
+                    self.__notify("after_mapping", event)
             finally:
-                cursor.close()
+                self.__release_cursor(cursor, reusable)
         except Exception as error:
             mapped = self.__map_driver_error(error)
             if mapped is not None:
@@ -176,14 +1105,44 @@ class Mapper(object):
 
     returning_all = select_all
 
-    def insert(self, sql, parameter=None):
+    def select_pages(self, sql, parameter=None, key="id", result_type=None, page_size=1000, checkpoint=None):
         try:
-            cursor = self.connection.cursor(**self.__cursor_params)
-            try:
-                cursor.execute(*self.__map_parameter(sql, parameter))
-                return cursor.lastrowid
-            finally:
-                cursor.close()
+            keys = (key,) if isinstance(key, str) else tuple(key)
+            if checkpoint is None:
+                checkpoint = PageCheckpoint()
+            adaptive = page_size == "auto"
+            if adaptive:
+                page_size = checkpoint.page_size or self.initial_page_size
+            parameter = self.__page_parameter(sql, parameter)
+            get_key = attrgetter(*keys)
+            base = f"SELECT * FROM ({sql}) AS sqlmapper_page"
+            order = f"ORDER BY {', '.join(keys)} LIMIT :sqlmapper_page_size"
+            while True:
+                if checkpoint.last_key is None:
+                    page_sql = f"{base} {order}"
+                else:
+                    page_sql = f"{base} WHERE {self.__keyset_condition(keys)} {order}"
+                    last_key = checkpoint.last_key
+                    if len(keys) == 1 and not isinstance(last_key, (tuple, list)):
+                        last_key = (last_key,)
+                    for index, value in enumerate(last_key):
+                        parameter[f"sqlmapper_key_{index}"] = value
+                parameter["sqlmapper_page_size"] = page_size
+                started = time.perf_counter()
+                page = list(self.select_all(page_sql, parameter, result_type, array_size=page_size))
+                elapsed = time.perf_counter() - started
+                if not page:
+                    return
+                yield page
+                last_key = get_key(page[-1])
+                checkpoint.last_key = last_key if len(keys) > 1 else (last_key,)
+                checkpoint.page_size = page_size
+                checkpoint.pages += 1
+                checkpoint.rows += len(page)
+                if len(page) < page_size:
+                    return
+                if adaptive:
+                    page_size = self.__next_page_size(page_size, elapsed)
         except Exception as error:
             mapped = self.__map_driver_error(error)
             if mapped is not None:
@@ -191,14 +1150,22 @@ class Mapper(object):
             else:
                 raise
 
-    def update(self, sql, parameter=None):
+    def select_scalar(self, sql, parameter=None):
         try:
-            cursor = self.connection.cursor(**self.__cursor_params)
+            cursor = self.__tuple_cursor(sql)
+            reusable = False
             try:
-                cursor.execute(*self.__map_parameter(sql, parameter))
-                return cursor.rowcount
+                event = self.__execute(cursor, sql, parameter)
+                rows = self.__fetchmany(cursor, 2, event)
+                reusable = len(rows) < 2
+                self.__check_single_column(cursor)
+                if len(rows) > 1:
+                    raise MappingError("Expected exactly one row, but multiple rows were returned.")
+                if event is not None:
+                    self.__notify("after_mapping", event)
+                return rows[0][0] if rows else None
             finally:
-                cursor.close()
+                self.__release_cursor(cursor, reusable)
         except Exception as error:
             mapped = self.__map_driver_error(error)
             if mapped is not None:
@@ -206,16 +1173,26 @@ class Mapper(object):
             else:
                 raise
 
-    delete = update
-
-    def upsert(self, sql, parameter=None):
+    def select_column(self, sql, parameter=None, array_size=1000, buffered=True, chunked=False):
         try:
-            cursor = self.connection.cursor(**self.__cursor_params)
+            cursor = self.__tuple_cursor(sql, buffered, array_size)
+            reusable = False
             try:
-                cursor.execute(*self.__map_parameter(sql, parameter))
-                return cursor.rowcount, cursor.lastrowid
+                event = self.__execute(cursor, sql, parameter)
+                rows = self.__fetchmany(cursor, array_size, event)
+                self.__check_single_column(cursor)
+                first = itemgetter(0)
+                while rows:
+                    if chunked:
+                        yield list(map(first, rows))
+                    else:
+                        yield from map(first, rows)
+                    rows = self.__fetchmany(cursor, array_size, event)
+                reusable = True
+                if event is not None:
+                    self.__notify("after_mapping", event)
             finally:
-                cursor.close()
+                self.__release_cursor(cursor, reusable)
         except Exception as error:
             mapped = self.__map_driver_error(error)
             if mapped is not None:
@@ -223,15 +1200,43 @@ class Mapper(object):
             else:
                 raise
 
-    ignore = upsert
-
-    def execute(self, sql, parameter=None):
+    def select_nested(self, sql, parameter, result_map, ordered=False, array_size=1000, buffered=True):
         try:
-            cursor = self.connection.cursor(**self.__cursor_params)
+            cursor = self.__select_cursor(sql, buffered, array_size)
+            reusable = False
             try:
-                cursor.execute(*self.__map_parameter(sql, parameter))
+                event = self.__execute(cursor, sql, parameter)
+                rows = self.__fetchmany(cursor, array_size, event)
+                if rows:
+                    plan = self.__result_map_plan(result_map, self.__row_names(cursor, rows[0]), "")
+                seen = {}
+                current_key = pending = None
+                while rows:
+                    for row in rows:
+                        values = row if self.tuple_rows else tuple(row.values())
+                        if ordered:
+                            key = plan.key(values)
+                            if key != current_key:
+                                if pending is not None:
+                                    yield pending
+                                    pending = None
+                                seen.clear()
+                                current_key = key
+                        result, created = plan.assemble(values, seen)
+                        if created:
+                            pending = result
+                    rows = self.__fetchmany(cursor, array_size, event)
+                reusable = True
+                if ordered:
+                    if pending is not None:
+                        yield pending
+                else:
+                    for result, _ in seen.values():
+                        yield result
+                if event is not None:
+                    self.__notify("after_mapping", event)
             finally:
-                cursor.close()
+                self.__release_cursor(cursor, reusable)
         except Exception as error:
             mapped = self.__map_driver_error(error)
             if mapped is not None:
@@ -239,9 +1244,45 @@ class Mapper(object):
             else:
                 raise
 
-    def commit(self):
+    def select_columns(self, sql, parameter=None, dtypes=None, array_size=10000, buffered=True, structured=False):
+        import numpy
+
         try:
-            self.connection.commit()
+            cursor = self.__select_cursor(sql, buffered, array_size)
+            reusable = False
+            try:
+                event = self.__execute(cursor, sql, parameter)
+                rows = self.__fetchmany(cursor, array_size, event)
+                if self.tuple_rows or not rows:
+                    names = tuple(column[0] for column in cursor.description)
+                else:
+                    names = tuple(rows[0])
+                columns = self.__transpose(rows, len(names))
+                declared = dtypes or {}
+                arrays = [
+                    numpy.empty(len(rows), dtype=declared[name] if name in declared else self.__infer_dtype(column))
+                    for name, column in zip(names, columns)
+                ]
+                length = 0
+                while rows:
+                    count = len(rows)
+                    if length + count > len(arrays[0]):
+                        capacity = max(len(arrays[0]) * 2, length + count)
+                        for array in arrays:
+                            array.resize(capacity, refcheck=False)
+                    for index, column in enumerate(columns):
+                        array = arrays[index]
+                        if array.dtype != object and names[index] not in declared:
+                            dtype = self.__promote_dtype(array, length, column)
+                            if dtype != array.dtype:
+                                array = arrays[index] = array.astype(dtype)
+                        array[length : length + count] = column
+                    length += count
+                    rows = self.__fetchmany(cursor, array_size, event)
+                    columns = self.__transpose(rows, len(names))
+                reusable = True
+            finally:
+                self.__release_cursor(cursor, reusable)
         except Exception as error:
             mapped = self.__map_driver_error(error)
             if mapped is not None:
@@ -249,9 +1290,202 @@ class Mapper(object):
             else:
                 raise
 
-    def rollback(self):
+        for array in arrays:
+            array.resize(length, refcheck=False)
+        if structured:
+            if len(set(names)) != len(names):
+                raise MappingError(f"Structured arrays require unique column names: {list(names)}")
+            result = numpy.empty(length, dtype=[(name, array.dtype) for name, array in zip(names, arrays)])
+            for name, array in zip(names, arrays):
+                result[name] = array
+            return result
+        else:
+            return dict(zip(names, arrays))
+
+    def insert(self, sql, parameter=None):
+        try:
+            cursor = self.__cursor(sql)
+            reusable = False
+            try:
+                self.__execute(cursor, sql, parameter)
+                reusable = True
+                self.__invalidate_cache(sql)
+                return self.dialect.lastrowid(cursor)
+            finally:
+                self.__release_cursor(cursor, reusable)
+        except Exception as error:
+            mapped = self.__map_driver_error(error)
+            if mapped is not None:
+                raise mapped from error
+            else:
+                raise
+
+    def update(self, sql, parameter=None):
+        try:
+            cursor = self.__cursor(sql)
+            reusable = False
+            try:
+                self.__execute(cursor, sql, parameter)
+                reusable = True
+                self.__invalidate_cache(sql)
+                return cursor.rowcount
+            finally:
+                self.__release_cursor(cursor, reusable)
+        except Exception as error:
+            mapped = self.__map_driver_error(error)
+            if mapped is not None:
+                raise mapped from error
+            else:
+                raise
+
+    delete = update
+
+    def upsert(self, sql, parameter=None):
+        try:
+            cursor = self.__cursor(sql)
+            reusable = False
+            try:
+                self.__execute(cursor, sql, parameter)
+                reusable = True
+                self.__invalidate_cache(sql)
+                return cursor.rowcount, self.dialect.lastrowid(cursor)
+            finally:
+                self.__release_cursor(cursor, reusable)
+        except Exception as error:
+            mapped = self.__map_driver_error(error)
+            if mapped is not None:
+                raise mapped from error
+            else:
+                raise
+
+    ignore = upsert
+
+    def update_many(self, sql, parameters, batch_size=1000):
+        try:
+            statement = self.__compile(sql)
+            if statement.expands:
+                raise MappingError("List bind variables marked with '*' are not supported by update_many.")
+            cursor = self.__cursor(sql)
+            reusable = False
+            try:
+                rowcount = 0
+                iterator = iter(parameters)
+                batch = list(map(statement.bind, islice(iterator, batch_size)))
+                statement_sql = self.__prepare(cursor, statement) if self.prepared and batch else statement.sql
+                while batch:
+                    if self.__listeners:
+                        self.__executemany(cursor, sql, statement_sql, statement, batch)
+                    else:
+                        self.dialect.executemany(cursor, statement_sql, batch)
+                    if cursor.rowcount > 0:
+                        rowcount += cursor.rowcount
+                    self.__invalidate_cache(sql)
+                    batch = list(map(statement.bind, islice(iterator, batch_size)))
+                reusable = True
+                return rowcount
+            finally:
+                self.__release_cursor(cursor, reusable)
+        except Exception as error:
+            mapped = self.__map_driver_error(error)
+            if mapped is not None:
+                raise mapped from error
+            else:
+                raise
+
+    insert_many = update_many
+    delete_many = update_many
+
+    def copy_in(self, table, columns, rows):
+        try:
+            self.__check_copying()
+            sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+            cursor = self.connection.cursor()
+            try:
+                rowcount = self.dialect.copy_in(cursor, sql, map(self.__column_getter(columns), rows))
+                self.__invalidate_cache(sql)
+                return rowcount
+            finally:
+                cursor.close()
+        except Exception as error:
+            mapped = self.__map_driver_error(error)
+            if mapped is not None:
+                raise mapped from error
+            else:
+                raise
+
+    def copy_out(self, sql, parameter=None, result_type=None, raw=False):
+        try:
+            self.__check_copying()
+            statement, values = self.__bind(self.__compile(sql), parameter)
+            cursor = self.connection.cursor()
+            try:
+                if raw:
+                    chunks = self.dialect.copy_out(
+                        cursor, f"COPY ({statement.sql}) TO STDOUT WITH (FORMAT csv, HEADER true)", values
+                    )
+                else:
+                    cursor.execute(f"SELECT * FROM ({statement.sql}) AS copy_out LIMIT 0", values)
+                    hydrate = self.__hydrator(result_type, tuple(column[0] for column in cursor.description))
+                    chunks = self.dialect.copy_out_rows(
+                        cursor,
+                        f"COPY ({statement.sql}) TO STDOUT",
+                        values,
+                        tuple(column[1] for column in cursor.description),
+                    )
+                self.__copying = True
+                try:
+                    if raw:
+                        for chunk in chunks:
+                            yield chunk
+                    else:
+                        for row in chunks:
+                            yield hydrate(row)
+                finally:
+                    self.__copying = False
+                    chunks.close()
+            finally:
+                cursor.close()
+        except Exception as error:
+            mapped = self.__map_driver_error(error)
+            if mapped is not None:
+                raise mapped from error
+            else:
+                raise
+
+    def execute(self, sql, parameter=None):
+        try:
+            cursor = self.__cursor(sql)
+            reusable = False
+            try:
+                self.__execute(cursor, sql, parameter)
+                reusable = cursor.description is None
+                self.__invalidate_cache(sql)
+            finally:
+                self.__release_cursor(cursor, reusable)
+        except Exception as error:
+            mapped = self.__map_driver_error(error)
+            if mapped is not None:
+                raise mapped from error
+            else:
+                raise
+
+    def commit(self):
+        try:
+            self.__check_copying()
+            self.connection.commit()
+            self.__flush_dirty_tags()
+        except Exception as error:
+            mapped = self.__map_driver_error(error)
+            if mapped is not None:
+                raise mapped from error
+            else:
+                raise
+
+    def rollback(self):
         try:
+            self.__check_copying()
             self.connection.rollback()
+            self.__flush_dirty_tags()
         except Exception as error:
             mapped = self.__map_driver_error(error)
             if mapped is not None:
@@ -259,78 +1493,1180 @@ class Mapper(object):
             else:
                 raise
 
-    def __map_parameter(self, sql, parameter):
-        represented_sql = ""
-        parameters = ()
-        start = 0
-        for match in re.finditer("(?<!:):[a-zA-Z_][a-zA-Z0-9_]*", sql):
-            represented_sql += sql[start : match.start()] + self.__place_holder
-            start = match.end()
-            parameters += (self.__get_variable(parameter, sql[match.start() + 1 : match.end()]),)
-        represented_sql += sql[start:]
-        return represented_sql, parameters
+    def __cache_lookup(self, sql, parameter, cache):
+        if cache is True:
+            tags = ResultCache.read_tags(sql)
+        else:
+            tags = frozenset(ResultCache.normalize_tag(tag) for tag in cache)
+        if self.__dirty_tags is None or not self.__dirty_tags.isdisjoint(tags):
+            return None, None, None
+        key = self.__map_parameter(sql, parameter)
+        try:
+            hash(key)
+        except TypeError:
+            return None, None, None
+        return key, tags, self.result_cache.get(key)
 
-    def __map_driver_error(self, error):
-        if isinstance(error, self.driver.NotSupportedError):
-            return DriverNotSupportedError(*error.args)
-        elif isinstance(error, self.driver.ProgrammingError):
-            return DriverProgrammingError(*error.args)
-        elif isinstance(error, self.driver.InternalError):
-            return DriverInternalError(*error.args)
-        elif isinstance(error, self.driver.IntegrityError):
-            return DriverIntegrityError(*error.args)
-        elif isinstance(error, self.driver.OperationalError):
-            return DriverOperationalError(*error.args)
-        elif isinstance(error, self.driver.DataError):
-            return DriverDataError(*error.args)
-        elif isinstance(error, self.driver.DatabaseError):
-            return DriverDatabaseError(*error.args)
-        elif isinstance(error, self.driver.InterfaceError):
-            return DriverInterfaceError(*error.args)
-        elif isinstance(error, self.driver.Error):
-            return DriverError(*error.args)
-        elif isinstance(error, self.driver.Warning):
-            return DriverWarning(*error.args)
+    def __cache_store(self, key, tags, cursor, rows, size):
+        names = self.__row_names(cursor, rows[0]) if rows else ()
+        if not self.tuple_rows:
+            rows = [tuple(row.values()) for row in rows]
+        self.result_cache.put(key, names, rows, tags, size)
+
+    @staticmethod
+    def __rows_size(rows):
+        size = sys.getsizeof(rows)
+        for row in rows:
+            size += sys.getsizeof(row) + sum(map(sys.getsizeof, row.values() if isinstance(row, dict) else row))
+        return size
+
+    def __invalidate_cache(self, sql):
+        if self.result_cache is None:
+            return
+        tags = ResultCache.write_tags(sql)
+        self.result_cache.invalidate(tags)
+        if self.__dirty_tags is not None:
+            if tags is None:
+                self.__dirty_tags = None
+            else:
+                self.__dirty_tags.update(tags)
+
+    def __flush_dirty_tags(self):
+        if self.result_cache is not None and self.__dirty_tags != set():
+            self.result_cache.invalidate(self.__dirty_tags)
+        self.__dirty_tags = set()
+
+    def add_listener(self, listener):
+        self.__listeners = self.__listeners + (listener,)
+
+    def remove_listener(self, listener):
+        self.__listeners = tuple(item for item in self.__listeners if item is not listener)
+
+    def prepared_stats(self):
+        stats = dict(self.__prepared_counts)
+        stats["size"] = len(self.__prepared_statements)
+        stats["max_size"] = self.max_prepared_statements
+        return stats
+
+    def __tuple_cursor(self, sql, buffered=None, array_size=None):
+        self.__check_copying()
+        if self.tuple_rows:
+            if buffered is None:
+                return self.__cursor(sql)
+            return self.__select_cursor(sql, buffered, array_size)
+        dialect = self.__tuple_dialect
+        if buffered:
+            cursor = self.connection.cursor(**dialect.buffered_cursor_params)
+        elif buffered is not None and dialect.server_side_cursors and self.__declarable.match(sql):
+            return dialect.server_side_cursor(self.connection, f"sqlmapper_{next(self.__cursor_names)}", array_size)
         else:
+            cursor = self.connection.cursor(**dialect.cursor_params)
+        return dialect.tuple_cursor(cursor)
+
+    @staticmethod
+    def __check_single_column(cursor):
+        if cursor.description is not None and len(cursor.description) != 1:
+            raise MappingError(f"Expected exactly one column, but {len(cursor.description)} columns were returned.")
+
+    def __execute(self, cursor, sql, parameter):
+        if self.prepared:
+            statement, values = self.__bind(self.__compile(sql), parameter)
+            statement_sql = self.__prepare(cursor, statement)
+        else:
+            statement_sql, values = self.__map_parameter(sql, parameter)
+        if not self.__listeners:
+            cursor.execute(statement_sql, values)
             return None
+        event = StatementEvent(sql, len(values))
+        self.__notify("before_execute", event)
+        started = time.perf_counter()
+        try:
+            cursor.execute(statement_sql, values)
+        except Exception as error:
+            event.execute_time = time.perf_counter() - started
+            self.__notify_error(event, error)
+            raise
+        event.execute_time = time.perf_counter() - started
+        event.rowcount = cursor.rowcount
+        self.__notify("after_execute", event)
+        return event
+
+    def __executemany(self, cursor, sql, statement_sql, statement, batch):
+        event = StatementEvent(sql, len(batch) * len(statement.names))
+        self.__notify("before_execute", event)
+        started = time.perf_counter()
+        try:
+            self.dialect.executemany(cursor, statement_sql, batch)
+        except Exception as error:
+            event.execute_time = time.perf_counter() - started
+            self.__notify_error(event, error)
+            raise
+        event.execute_time = time.perf_counter() - started
+        event.rowcount = cursor.rowcount
+        self.__notify("after_execute", event)
+
+    def __fetchmany(self, cursor, array_size, event):
+        if event is None:
+            return cursor.fetchmany(array_size)
+        started = time.perf_counter()
+        try:
+            rows = cursor.fetchmany(array_size)
+        except Exception as error:
+            event.fetch_time += time.perf_counter() - started
+            self.__notify_error(event, error)
+            raise
+        event.fetch_time += time.perf_counter() - started
+        event.fetch_count += 1
+        event.chunk_rows = len(rows)
+        event.rows += len(rows)
+        self.__notify("after_fetch", event)
+        return rows
 
     @staticmethod
-    def __sqlite3_dict_row_factory(cursor, row):
-        fields = [column[0] for column in cursor.description]
-        return {key: value for key, value in zip(fields, row)}
+    def __map_rows(hydrate, rows, event):
+        started = time.perf_counter()
+        results = list(map(hydrate, rows))
+        event.mapping_time += time.perf_counter() - started
+        return results
+
+    def __notify(self, name, event):
+        for listener in self.__listeners:
+            getattr(listener, name)(event)
+
+    def __notify_error(self, event, error):
+        event.error = self.__map_driver_error(error) or error
+        self.__notify("error", event)
 
     @staticmethod
-    def __get_variable(parameter, name):
-        if isinstance(parameter, dict):
+    def __column_getter(columns):
+        columns = tuple(columns)
+        get_items = itemgetter(*columns)
+        get_attrs = attrgetter(*columns)
+
+        def get(row):
             try:
-                return parameter[name]
-            except KeyError:
-                raise MappingError(
-                    f"Bind variable '{name}' was not found in dict parameter. Available keys: {sorted(parameter.keys())}"
-                )
+                values = get_items(row) if isinstance(row, dict) else get_attrs(row)
+            except (KeyError, AttributeError):
+                return tuple(Statement.get_variable(row, column) for column in columns)
+            return values if len(columns) > 1 else (values,)
+
+        return get
+
+    def __check_copying(self):
+        if self.__copying:
+            raise MappingError(
+                "copy_out is in progress on this Mapper. Exhaust or close its iterator before running other statements."
+            )
+
+    def __select_cursor(self, sql, buffered, array_size):
+        self.__check_copying()
+        if buffered:
+            return self.__reusable_cursor(True)
+        elif self.dialect.server_side_cursors and self.__declarable.match(sql):
+            return self.dialect.server_side_cursor(
+                self.connection, f"sqlmapper_{next(self.__cursor_names)}", array_size
+            )
         else:
-            try:
-                return getattr(parameter, name)
-            except AttributeError:
-                raise MappingError(
-                    f"Bind variable '{name}' was not found in parameter object of type '{type(parameter).__name__}'."
-                )
+            return self.__cursor(sql)
+
+    def __cursor(self, sql):
+        self.__check_copying()
+        if not self.prepared or self.dialect.prepared_cursor_params is None:
+            return self.__reusable_cursor(False)
+        key = self.__compile(sql).sql
+        cursor = self.__prepared_statements.pop(key, None)
+        if cursor is None:
+            cursor = self.connection.cursor(**self.dialect.prepared_cursor_params)
+            self.__prepared_counts["misses"] += 1
+        else:
+            self.__prepared_counts["hits"] += 1
+        self.__prepared_checkouts[id(cursor)] = key
+        return cursor
+
+    def __reusable_cursor(self, buffered):
+        params = self.dialect.buffered_cursor_params if buffered else self.dialect.cursor_params
+        if not self.reuse_cursors:
+            return self.connection.cursor(**params)
+        cursor = self.__idle_cursors.pop(buffered, None)
+        if cursor is None:
+            cursor = self.connection.cursor(**params)
+        self.__cursor_checkouts[id(cursor)] = buffered
+        return cursor
+
+    def __release_cursor(self, cursor, reusable):
+        if id(cursor) in self.__cursor_checkouts:
+            buffered = self.__cursor_checkouts.pop(id(cursor))
+            if reusable and buffered not in self.__idle_cursors and self.connection is not None:
+                self.__idle_cursors[buffered] = cursor
+                return
+            cursor.close()
+            return
+        key = self.__prepared_checkouts.pop(id(cursor), None)
+        if key is None or not reusable or key in self.__prepared_statements or self.connection is None:
+            cursor.close()
+            return
+        self.__prepared_statements[key] = cursor
+        while len(self.__prepared_statements) > self.max_prepared_statements:
+            self.__prepared_statements.popitem(last=False)[1].close()
+            self.__prepared_counts["evictions"] += 1
+
+    def __clear_idle_cursors(self):
+        cursors = list(self.__idle_cursors.values())
+        self.__idle_cursors.clear()
+        self.__cursor_checkouts.clear()
+        for cursor in cursors:
+            cursor.close()
+
+    def __prepare(self, cursor, statement):
+        if self.dialect.prepared_mode == "cursor" or not self.__preparable.match(statement.sql):
+            return statement.sql
+        elif self.dialect.prepared_mode == "cache":
+            if statement.sql in self.__prepared_statements:
+                self.__prepared_statements.move_to_end(statement.sql)
+                self.__prepared_counts["hits"] += 1
+            else:
+                self.__prepared_statements[statement.sql] = True
+                self.__prepared_counts["misses"] += 1
+                while len(self.__prepared_statements) > self.max_prepared_statements:
+                    self.__prepared_statements.popitem(last=False)
+                    self.__prepared_counts["evictions"] += 1
+            return statement.sql
+        elif cursor.name is not None:
+            return statement.sql
+        name = self.__prepared_statements.get(statement.sql)
+        if name is None:
+            while len(self.__prepared_statements) >= self.max_prepared_statements:
+                cursor.execute(f"DEALLOCATE {self.__prepared_statements.popitem(last=False)[1]}")
+                self.__prepared_counts["evictions"] += 1
+            name = f"sqlmapper_{next(self.__cursor_names)}"
+            body = statement.fragments[0]
+            for index, fragment in enumerate(statement.fragments[1:], 1):
+                body += f"${index}{fragment}"
+            cursor.execute(f"PREPARE {name} AS {body.replace('%%', '%')}")
+            self.__prepared_statements[statement.sql] = name
+            self.__prepared_counts["misses"] += 1
+        else:
+            self.__prepared_statements.move_to_end(statement.sql)
+            self.__prepared_counts["hits"] += 1
+        if statement.names:
+            return f"EXECUTE {name} ({', '.join(['%s'] * len(statement.names))})"
+        else:
+            return f"EXECUTE {name}"
+
+    def __clear_prepared_statements(self):
+        if self.dialect.prepared_mode == "cursor":
+            for cursor in self.__prepared_statements.values():
+                cursor.close()
+        self.__prepared_statements.clear()
+        self.__prepared_checkouts.clear()
+
+    def __page_parameter(self, sql, parameter):
+        if parameter is None:
+            return {}
+        elif isinstance(parameter, dict):
+            return dict(parameter)
+        else:
+            return {name: Statement.get_variable(parameter, name) for name in self.__compile(sql).names}
 
     @staticmethod
-    def __create_result(row, result_type):
-        if result_type is None:
+    def __keyset_condition(keys):
+        conditions = []
+        for position, name in enumerate(keys):
+            terms = [f"{keys[index]} = :sqlmapper_key_{index}" for index in range(position)]
+            terms.append(f"{name} > :sqlmapper_key_{position}")
+            conditions.append(f"({' AND '.join(terms)})")
+        return " OR ".join(conditions)
+
+    def __next_page_size(self, page_size, elapsed):
+        factor = min(2.0, max(0.5, self.page_time_target / elapsed)) if elapsed > 0 else 2.0
+        return max(1, min(int(page_size * factor), self.max_page_size))
+
+    def __next_fetch_size(self, array_size, rows, stats):
+        row = rows[0]
+        values = row.values() if isinstance(row, dict) else row
+        row_bytes = sys.getsizeof(row) + sum(map(sys.getsizeof, values))
+        if stats is not None:
+            stats.row_bytes = row_bytes
+        limit = max(1, self.fetch_memory_budget // row_bytes)
+        return max(1, min(array_size * 2, limit, self.max_fetch_size))
+
+    @staticmethod
+    def __record_fetch(stats, array_size, rows):
+        if rows:
+            stats.array_size = array_size
+            stats.max_array_size = max(stats.max_array_size, array_size)
+            stats.row_count += len(rows)
+        stats.fetch_count += 1
+
+    def __map_parameter(self, sql, parameter):
+        statement, values = self.__bind(self.__compile(sql), parameter)
+        return statement.sql, values
+
+    @staticmethod
+    def __bind(statement, parameter):
+        values = statement.bind(parameter)
+        if statement.expands:
+            return statement.expand(values)
+        return statement, values
+
+    def __compile(self, sql):
+        place_holder = self.dialect.place_holder
+        return self.statement_cache.get((sql, place_holder), lambda: Statement(sql, place_holder))
+
+    def __map_driver_error(self, error):
+        return self.dialect.map_error(error)
+
+    @staticmethod
+    def __has_dataclass_init(result_type):
+        if not dataclasses.is_dataclass(result_type):
+            return False
+        owner = next(klass for klass in result_type.__mro__ if "__init__" in vars(klass))
+        return "__dataclass_params__" in vars(owner) and all(
+            klass.__dataclass_params__.init for klass in result_type.__mro__ if "__dataclass_params__" in vars(klass)
+        )
+
+    def __transpose(self, rows, width):
+        if not rows:
+            return [()] * width
+        elif self.tuple_rows:
+            return list(zip(*rows))
+        else:
+            return list(zip(*(row.values() for row in rows)))
+
+    @staticmethod
+    def __infer_dtype(column):
+        if len(column) == 0 or None in column:
+            return object
+        types = set(map(type, column))
+        if types == {bool}:
+            return bool
+        elif types == {int}:
+            if -(2**63) <= min(column) and max(column) < 2**63:
+                return "int64"
+            return object
+        elif types <= {int, float}:
+            if all(-(2**53) <= value <= 2**53 for value in column if type(value) is int):
+                return "float64"
+            return object
+        else:
+            return object
+
+    @staticmethod
+    def __promote_dtype(array, length, column):
+        dtype = Mapper.__infer_dtype(column)
+        if dtype == array.dtype:
+            return array.dtype
+        elif array.dtype.name == "int64" and dtype == "float64":
+            if (abs(array[:length]) <= 2**53).all():
+                return "float64"
+        elif array.dtype.name == "float64" and dtype == "int64":
+            if all(-(2**53) <= value <= 2**53 for value in column):
+                return "float64"
+        return object
+
+    def __row_hydrator(self, cursor, row, result_type):
+        hydrate = self.__hydrator(result_type, self.__row_names(cursor, row))
+        if self.tuple_rows:
+            return hydrate
+        else:
+            return lambda row: hydrate(row.values())
+
+    def __result_map_plan(self, result_map, names, prefix):
+        prefix += result_map.prefix
+        nested = list(result_map.collections.items()) + list(result_map.associations.items())
+        for name, child in nested:
+            if not child.prefix:
+                raise MappingError(f"Nested result map '{name}' must declare a column prefix.")
+        nested_prefixes = tuple(prefix + child.prefix for _, child in nested)
+        positions = []
+        fields = []
+        for position, name in enumerate(names):
+            if name.startswith(prefix) and not name.startswith(nested_prefixes):
+                positions.append(position)
+                fields.append(name[len(prefix) :])
+        keys = (result_map.key,) if isinstance(result_map.key, str) else tuple(result_map.key)
+        key_positions = []
+        for key in keys:
+            if key not in fields:
+                raise MappingError(f"Key column '{prefix}{key}' was not found in the result set.")
+            key_positions.append(positions[fields.index(key)])
+        if result_map.result_type is None:
+            hydrate = self.__dynamic_hydrator(tuple(fields))
+        else:
+            hydrate = self.__hydrator(result_map.result_type, tuple(fields))
+        return _ResultMapPlan(
+            hydrate,
+            positions,
+            key_positions,
+            [(name, self.__result_map_plan(child, names, prefix)) for name, child in result_map.collections.items()],
+            [(name, self.__result_map_plan(child, names, prefix)) for name, child in result_map.associations.items()],
+        )
+
+    @staticmethod
+    def __dynamic_hydrator(names):
+        def hydrate(values):
             result = Result()
-            for name in row:
-                setattr(result, name, row[name])
+            result.__dict__.update(zip(names, values))
             return result
+
+        return hydrate
+
+    def __row_names(self, cursor, row):
+        if self.tuple_rows:
+            return tuple(column[0] for column in cursor.description)
         else:
-            try:
+            return tuple(row)
+
+    def __hydrator(self, result_type, names):
+        return self.hydrator_cache.get((result_type, names), lambda: self.__compile_hydrator(result_type, names))
+
+    @staticmethod
+    def __compile_hydrator(result_type, names):
+        if result_type is None:
+            if not _SlottedResult.supports(names):
+                return Mapper.__dynamic_hydrator(names)
+
+            result_type = _SlottedResult.for_names(names)
+            setters = [vars(result_type)[name].__set__ for name in names]
+
+            def hydrate(values):
                 result = result_type()
-            except TypeError:
-                raise MappingError(f"Result type '{result_type}' must be instantiable without arguments.")
-            for name in row:
-                if hasattr(result, name):
-                    setattr(result, name, row[name])
-                else:
-                    raise MappingError(f"Attribute '{name}' was not found in result_type '{result_type.__name__}'.")
+                for setter, value in zip(setters, values):
+                    setter(result, value)
+                return result
+
+            return hydrate
+
+        if isinstance(result_type, type) and issubclass(result_type, LazyResult):
+            index = {name: position for position, name in enumerate(names)}
+            return lambda values: result_type(tuple(values), index)
+
+        try:
+            probe = result_type()
+        except TypeError:
+            raise MappingError(f"Result type '{result_type}' must be instantiable without arguments.")
+        for name in names:
+            if not hasattr(probe, name):
+                raise MappingError(f"Attribute '{name}' was not found in result_type '{result_type.__name__}'.")
+
+        if isinstance(result_type, type):
+            hydrate = Mapper.__class_hydrator(result_type, probe, names)
+            if hydrate is not None:
+                return hydrate
+
+        def hydrate(values):
+            result = result_type()
+            for name, value in zip(names, values):
+                setattr(result, name, value)
             return result
+
+        return hydrate
+
+    @staticmethod
+    def __class_hydrator(result_type, probe, names):
+        if Mapper.__has_dataclass_init(result_type) and not hasattr(result_type, "__post_init__"):
+            init_fields = {field.name for field in dataclasses.fields(result_type) if field.init}
+            if len(set(names)) == len(names) and init_fields.issuperset(names):
+                return lambda values: result_type(**dict(zip(names, values)))
+
+        descriptors = []
+        for name in names:
+            descriptor = None
+            for klass in result_type.__mro__:
+                if name in vars(klass):
+                    descriptor = vars(klass)[name]
+                    break
+            descriptors.append(descriptor if hasattr(type(descriptor), "__set__") else None)
+
+        if type(probe).__setattr__ is object.__setattr__:
+            if hasattr(probe, "__dict__") and all(descriptor is None for descriptor in descriptors):
+
+                def hydrate(values):
+                    result = result_type()
+                    result.__dict__.update(zip(names, values))
+                    return result
+
+                return hydrate
+
+            if all(isinstance(descriptor, types.MemberDescriptorType) for descriptor in descriptors):
+                setters = [descriptor.__set__ for descriptor in descriptors]
+
+                def hydrate(values):
+                    result = result_type()
+                    for setter, value in zip(setters, values):
+                        setter(result, value)
+                    return result
+
+                return hydrate
+
+        return None
+
+
+class MapperPool(object):
+    def __init__(
+        self,
+        driver,
+        *,
+        min_size=1,
+        max_size=10,
+        timeout=None,
+        max_idle_time=None,
+        max_lifetime=None,
+        validation_sql="SELECT 1",
+        **params,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise MappingError(f"Invalid pool size: min_size={min_size}, max_size={max_size}.")
+        self.driver = driver
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle_time = max_idle_time
+        self.max_lifetime = max_lifetime
+        self.validation_sql = validation_sql
+        self.__params = params
+        self.__idle = deque()
+        self.__size = 0
+        self.__in_use = 0
+        self.__closed = False
+        self.__condition = threading.Condition()
+        self.__stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "total_wait_time": 0.0,
+            "max_wait_time": 0.0,
+        }
+        for _ in range(self.min_size):
+            self.__idle.append(self.__create())
+            self.__size += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @contextmanager
+    def session(self, timeout=None):
+        entry = self.__checkout(self.timeout if timeout is None else timeout)
+        try:
+            yield entry.mapper
+        finally:
+            self.__checkin(entry)
+
+    def select_parallel(
+        self,
+        sql,
+        parameter=None,
+        key="id",
+        partitions=4,
+        result_type=None,
+        ordered=False,
+        partition_by="modulo",
+        array_size=1000,
+        max_chunks=4,
+    ):
+        if partitions < 1 or partitions > self.max_size:
+            raise MappingError(
+                f"Invalid partition count: {partitions}. It must be between 1 and the pool max_size {self.max_size}."
+            )
+        conditions = self.__partition_conditions(sql, parameter, key, partitions, partition_by)
+        order = f" ORDER BY {key}" if ordered else ""
+        queries = [f"SELECT * FROM ({sql}) AS sqlmapper_scan WHERE {condition}{order}" for condition in conditions]
+        if not queries:
+            return
+        scan = _ParallelScan(self, result_type, array_size)
+        executor = ThreadPoolExecutor(max_workers=len(queries), thread_name_prefix="sqlmapper-scan")
+        try:
+            if ordered:
+                queues = [queue.Queue(max_chunks) for _ in queries]
+                for query, chunks in zip(queries, queues):
+                    executor.submit(scan.run, query, parameter, chunks)
+                yield from heapq.merge(*(scan.drain(chunks, 1) for chunks in queues), key=attrgetter(key))
+            else:
+                chunks = queue.Queue(max_chunks * len(queries))
+                for query in queries:
+                    executor.submit(scan.run, query, parameter, chunks)
+                yield from scan.drain(chunks, len(queries))
+        finally:
+            scan.cancel()
+            executor.shutdown(wait=True)
+
+    def prune(self):
+        if self.max_idle_time is None and self.max_lifetime is None:
+            return
+        now = time.monotonic()
+        expired = []
+        with self.__condition:
+            for entry in list(self.__idle):
+                if self.__size - len(expired) <= self.min_size:
+                    break
+                if self.__is_expired(entry, now):
+                    self.__idle.remove(entry)
+                    expired.append(entry)
+            self.__size -= len(expired)
+            self.__stats["discarded"] += len(expired)
+            self.__condition.notify(len(expired))
+        for entry in expired:
+            self.__close(entry)
+
+    def close(self):
+        with self.__condition:
+            self.__closed = True
+            idle = list(self.__idle)
+            self.__idle.clear()
+            self.__size -= len(idle)
+            self.__condition.notify_all()
+        for entry in idle:
+            self.__close(entry)
+
+    def stats(self):
+        with self.__condition:
+            stats = dict(self.__stats)
+            stats["size"] = self.__size
+            stats["idle"] = len(self.__idle)
+            stats["in_use"] = self.__in_use
+            stats["max_size"] = self.max_size
+        stats["utilization"] = stats["in_use"] / stats["max_size"]
+        stats["average_wait_time"] = stats["total_wait_time"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return stats
+
+    def __checkout(self, timeout):
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        waited = False
+        while True:
+            entry = None
+            expired = []
+            with self.__condition:
+                while True:
+                    if self.__closed:
+                        raise MappingError("Pool is closed.")
+                    now = time.monotonic()
+                    while self.__idle:
+                        candidate = self.__idle.pop()
+                        if self.__is_expired(candidate, now):
+                            expired.append(candidate)
+                            self.__size -= 1
+                            self.__stats["discarded"] += 1
+                        else:
+                            entry = candidate
+                            break
+                    if entry is not None or self.__size < self.max_size:
+                        if entry is None:
+                            self.__size += 1
+                        self.__in_use += 1
+                        break
+                    remaining = None if deadline is None else deadline - now
+                    if remaining is not None and remaining <= 0:
+                        self.__stats["timeouts"] += 1
+                        raise PoolTimeoutError(f"Timed out after {timeout} seconds waiting for a pooled connection.")
+                    waited = True
+                    self.__condition.wait(remaining)
+            for candidate in expired:
+                self.__close(candidate)
+
+            if entry is None:
+                try:
+                    entry = self.__create()
+                except Exception:
+                    with self.__condition:
+                        self.__size -= 1
+                        self.__in_use -= 1
+                        self.__condition.notify()
+                    raise
+            elif not self.__validate(entry):
+                self.__discard(entry)
+                continue
+
+            wait_time = time.monotonic() - started
+            with self.__condition:
+                self.__stats["checkouts"] += 1
+                self.__stats["total_wait_time"] += wait_time
+                self.__stats["max_wait_time"] = max(self.__stats["max_wait_time"], wait_time)
+                if waited:
+                    self.__stats["waits"] += 1
+            return entry
+
+    def __checkin(self, entry):
+        try:
+            entry.mapper.rollback()
+        except Exception:
+            self.__discard(entry)
+            return
+        now = time.monotonic()
+        with self.__condition:
+            if not self.__closed and (self.max_lifetime is None or now - entry.created_at < self.max_lifetime):
+                entry.returned_at = now
+                self.__idle.append(entry)
+                self.__in_use -= 1
+                self.__condition.notify()
+                entry = None
+        if entry is not None:
+            self.__discard(entry)
+        else:
+            self.prune()
+
+    def __partition_conditions(self, sql, parameter, key, partitions, partition_by):
+        if partition_by == "modulo":
+            expression = Dialect.for_driver(self.driver, False).modulo(key, partitions)
+            return [f"ABS({expression}) = {partition}" for partition in range(partitions)]
+        elif partition_by == "range":
+            with self.session() as mapper:
+                bounds = mapper.select_one(
+                    f"SELECT MIN({key}) AS low, MAX({key}) AS high FROM ({sql}) AS sqlmapper_scan", parameter
+                )
+            if bounds.low is None:
+                return []
+            if not isinstance(bounds.low, int) or not isinstance(bounds.high, int):
+                raise MappingError(f"Range partitioning requires an integer key, but '{key}' is not.")
+            step = (bounds.high - bounds.low) // partitions + 1
+            return [f"{key} >= {low} AND {key} < {low + step}" for low in range(bounds.low, bounds.high + 1, step)]
+        else:
+            raise MappingError(f"Unsupported partitioning '{partition_by}'. Use 'modulo' or 'range'.")
+
+    def __create(self):
+        mapper = Mapper(self.driver, **self.__params)
+        with self.__condition:
+            self.__stats["created"] += 1
+        return _PoolEntry(mapper)
+
+    def __validate(self, entry):
+        if self.validation_sql is None:
+            return True
+        try:
+            entry.mapper.select_one(self.validation_sql)
+            return True
+        except Exception:
+            return False
+
+    def __discard(self, entry):
+        with self.__condition:
+            self.__size -= 1
+            self.__in_use -= 1
+            self.__stats["discarded"] += 1
+            self.__condition.notify()
+        self.__close(entry)
+
+    def __is_expired(self, entry, now):
+        if self.max_lifetime is not None and now - entry.created_at >= self.max_lifetime:
+            return True
+        if self.max_idle_time is not None and now - entry.returned_at >= self.max_idle_time:
+            return True
+        return False
+
+    @staticmethod
+    def __close(entry):
+        try:
+            entry.mapper.close()
+        except Exception:
+            pass
+
+
+class _PoolEntry(object):
+    __slots__ = ("mapper", "created_at", "returned_at")
+
+    def __init__(self, mapper):
+        self.mapper = mapper
+        self.created_at = self.returned_at = time.monotonic()
+
+
+class _ParallelScan(object):
+    poll_interval = 0.05
+
+    def __init__(self, pool, result_type, array_size):
+        self.pool = pool
+        self.result_type = result_type
+        self.array_size = max(array_size, 1)
+        self.errors = []
+        self.__cancelled = threading.Event()
+        self.__lock = threading.Lock()
+        self.__mappers = set()
+
+    def run(self, sql, parameter, chunks):
+        try:
+            with self.pool.session() as mapper:
+                with self.__lock:
+                    if self.__cancelled.is_set():
+                        return
+                    self.__mappers.add(mapper)
+                try:
+                    results = mapper.select_all(
+                        sql, parameter, self.result_type, array_size=self.array_size, buffered=False
+                    )
+                    try:
+                        while not self.__cancelled.is_set():
+                            chunk = list(islice(results, self.array_size))
+                            if not chunk or not self.__put(chunks, chunk):
+                                break
+                    finally:
+                        results.close()
+                finally:
+                    with self.__lock:
+                        self.__mappers.discard(mapper)
+            self.__put(chunks, None)
+        except BaseException as error:
+            self.cancel(error)
+
+    def drain(self, chunks, partitions):
+        while partitions:
+            if self.errors:
+                raise self.errors[0]
+            try:
+                chunk = chunks.get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+            if chunk is None:
+                partitions -= 1
+            else:
+                yield from chunk
+
+    def cancel(self, error=None):
+        with self.__lock:
+            if error is not None and not self.__cancelled.is_set():
+                self.errors.append(error)
+            self.__cancelled.set()
+            mappers = list(self.__mappers)
+        for mapper in mappers:
+            mapper.dialect.interrupt(mapper.connection)
+
+    def __put(self, chunks, chunk):
+        while not self.__cancelled.is_set():
+            try:
+                chunks.put(chunk, timeout=self.poll_interval)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+
+class AsyncMapper(object):
+    def __init__(self, driver, **params):
+        self.driver = driver
+        self.__executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlmapper")
+        self.__mapper = self.__executor.submit(Mapper, driver, **params)
+        self.__generators = set()
+        self.__closed = False
+
+    async def __aenter__(self):
+        await self.__run(self.__mapper.result)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        if self.__closed:
+            return
+        try:
+            await self.__run(self.__close)
+        finally:
+            self.__closed = True
+            self.__executor.shutdown(wait=False)
+
+    async def select_one(self, sql, parameter=None, result_type=None, cache=False):
+        return await self.__call("select_one", sql, parameter, result_type, cache)
+
+    returning_one = select_one
+
+    async def select_all(
+        self, sql, parameter=None, result_type=None, array_size=1, buffered=True, stats=None, cache=False
+    ):
+        generator = await self.__call("select_all", sql, parameter, result_type, array_size, buffered, stats, cache)
+        self.__generators.add(generator)
+        chunk_size = Mapper.max_fetch_size if array_size == "auto" else array_size
+        try:
+            while True:
+                results = await self.__run(self.__fetch, generator, chunk_size)
+                if not results:
+                    break
+                for result in results:
+                    yield result
+        finally:
+            self.__release_generator(generator)
+
+    returning_all = select_all
+
+    async def select_scalar(self, sql, parameter=None):
+        return await self.__call("select_scalar", sql, parameter)
+
+    async def select_column(self, sql, parameter=None, array_size=1000, buffered=True, chunked=False):
+        generator = await self.__call("select_column", sql, parameter, array_size, buffered, chunked)
+        self.__generators.add(generator)
+        try:
+            while True:
+                values = await self.__run(self.__fetch, generator, 1 if chunked else array_size)
+                if not values:
+                    break
+                for value in values:
+                    yield value
+        finally:
+            self.__release_generator(generator)
+
+    async def select_nested(self, sql, parameter, result_map, ordered=False, array_size=1000, buffered=True):
+        generator = await self.__call("select_nested", sql, parameter, result_map, ordered, array_size, buffered)
+        self.__generators.add(generator)
+        try:
+            while True:
+                results = await self.__run(self.__fetch, generator, array_size)
+                if not results:
+                    break
+                for result in results:
+                    yield result
+        finally:
+            self.__release_generator(generator)
+
+    async def insert(self, sql, parameter=None):
+        return await self.__call("insert", sql, parameter)
+
+    async def update(self, sql, parameter=None):
+        return await self.__call("update", sql, parameter)
+
+    delete = update
+
+    async def upsert(self, sql, parameter=None):
+        return await self.__call("upsert", sql, parameter)
+
+    ignore = upsert
+
+    async def update_many(self, sql, parameters, batch_size=1000):
+        return await self.__call("update_many", sql, parameters, batch_size)
+
+    insert_many = update_many
+    delete_many = update_many
+
+    async def execute(self, sql, parameter=None):
+        return await self.__call("execute", sql, parameter)
+
+    async def commit(self):
+        return await self.__call("commit")
+
+    async def rollback(self):
+        return await self.__call("rollback")
+
+    async def __call(self, name, *args):
+        return await self.__run(self.__invoke, name, args)
+
+    async def __run(self, function, *args):
+        if self.__closed:
+            raise MappingError("AsyncMapper is closed.")
+        future = self.__executor.submit(function, *args)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if future.running():
+                self.__interrupt()
+            raise
+
+    def __invoke(self, name, args):
+        return getattr(self.__mapper.result(), name)(*args)
+
+    def __close(self):
+        generators = list(self.__generators)
+        self.__generators.clear()
+        for generator in generators:
+            generator.close()
+        self.__mapper.result().close()
+
+    def __release_generator(self, generator):
+        if generator in self.__generators:
+            self.__generators.discard(generator)
+            self.__executor.submit(generator.close)
+
+    def __interrupt(self):
+        if not self.__mapper.done() or self.__mapper.exception() is not None:
+            return
+        mapper = self.__mapper.result()
+        mapper.dialect.interrupt(mapper.connection)
+
+    @staticmethod
+    def __fetch(generator, array_size):
+        return list(islice(generator, max(array_size, 1)))
+
+
+class KeyLoader(object):
+    def __init__(self, mapper, sql, key="id", result_type=None, parameter=None, many=False, max_batch_size=1000):
+        self.mapper = mapper
+        self.sql = sql
+        self.key = key
+        self.result_type = result_type
+        self.parameter = parameter
+        self.many = many
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        names = [name for name in Statement(sql, "?").names if name != "keys"]
+        if parameter is None:
+            self.__parameter = {}
+        elif isinstance(parameter, dict):
+            self.__parameter = dict(parameter)
+        else:
+            self.__parameter = {name: Statement.get_variable(parameter, name) for name in names}
+        limit = Dialect.for_driver(mapper.driver, False).max_parameters - len(names)
+        self.__batch_size = max(1, min(max_batch_size, 1 << (limit.bit_length() - 1)))
+        self.__get_key = attrgetter(key)
+        self.__results = {}
+        self.__pending = {}
+        self.__futures = {}
+        self.__dispatcher = None
+
+    def add(self, key):
+        if key not in self.__results:
+            self.__pending[key] = None
+
+    def get(self, key):
+        if key not in self.__results:
+            self.add(key)
+            self.flush()
+        return self.__results[key]
+
+    def get_many(self, keys):
+        keys = list(keys)
+        for key in keys:
+            self.add(key)
+        self.flush()
+        return [self.__results[key] for key in keys]
+
+    def flush(self):
+        if isinstance(self.mapper, AsyncMapper):
+            raise MappingError("KeyLoader with AsyncMapper must be used through load() or load_many().")
+        for batch in self.__take_batches():
+            self.__store(
+                batch, self.mapper.select_all(self.sql, self.__batch_parameter(batch), self.result_type, len(batch))
+            )
+
+    async def load(self, key):
+        if key in self.__results:
+            return self.__results[key]
+        future = self.__futures.get(key)
+        if future is None:
+            future = self.__futures[key] = asyncio.get_running_loop().create_future()
+            self.__pending[key] = None
+            if self.__dispatcher is None:
+                self.__dispatcher = asyncio.ensure_future(self.__dispatch())
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys):
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def clear(self):
+        self.__results.clear()
+
+    async def __dispatch(self):
+        await asyncio.sleep(0)
+        self.__dispatcher = None
+        futures = {key: self.__futures[key] for key in self.__pending if key in self.__futures}
+        try:
+            for batch in self.__take_batches():
+                parameter = self.__batch_parameter(batch)
+                if isinstance(self.mapper, AsyncMapper):
+                    results = [
+                        result
+                        async for result in self.mapper.select_all(self.sql, parameter, self.result_type, len(batch))
+                    ]
+                else:
+                    results = self.mapper.select_all(self.sql, parameter, self.result_type, len(batch))
+                self.__store(batch, results)
+        except Exception as error:
+            for key, future in futures.items():
+                del self.__futures[key]
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            for key, future in futures.items():
+                del self.__futures[key]
+                if not future.done():
+                    future.set_result(self.__results[key])
+
+    def __take_batches(self):
+        keys = list(self.__pending)
+        self.__pending.clear()
+        return [keys[start : start + self.__batch_size] for start in range(0, len(keys), self.__batch_size)]
+
+    def __batch_parameter(self, batch):
+        return dict(self.__parameter, keys=batch)
+
+    def __store(self, batch, results):
+        loaded = {key: [] for key in batch} if self.many else dict.fromkeys(batch)
+        found = set()
+        for result in results:
+            key = self.__get_key(result)
+            if self.many:
+                loaded.setdefault(key, []).append(result)
+            elif key in found:
+                raise MappingError(f"Expected exactly one row for key {key!r}, but multiple rows were returned.")
+            else:
+                found.add(key)
+                loaded[key] = result
+        self.batches += 1
+        self.__results.update(loaded)
+
+
+class TransactionRunner(object):
+    def __init__(self, mapper, max_attempts=5, base_delay=0.01, max_delay=1.0):
+        if max_attempts < 1:
+            raise MappingError(f"Invalid max_attempts: {max_attempts}.")
+        self.mapper = mapper
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.__stats = {
+            "runs": 0,
+            "attempts": 0,
+            "retries": 0,
+            "successes": 0,
+            "failures": 0,
+            "exhausted": 0,
+            "total_time": 0.0,
+            "max_time": 0.0,
+            "backoff_time": 0.0,
+        }
+
+    def run(self, function, *args, **kwargs):
+        started = time.perf_counter()
+        self.__stats["runs"] += 1
+        try:
+            for attempt in range(1, self.max_attempts + 1):
+                self.__stats["attempts"] += 1
+                try:
+                    result = function(self.mapper, *args, **kwargs)
+                    self.mapper.commit()
+                except Exception as error:
+                    self.__rollback()
+                    retryable = self.is_retryable(error)
+                    if not retryable or attempt == self.max_attempts:
+                        self.__stats["failures"] += 1
+                        if retryable:
+                            self.__stats["exhausted"] += 1
+                        raise
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                    self.__stats["retries"] += 1
+                    self.__stats["backoff_time"] += delay
+                    time.sleep(delay)
+                else:
+                    self.__stats["successes"] += 1
+                    return result
+        finally:
+            elapsed = time.perf_counter() - started
+            self.__stats["total_time"] += elapsed
+            self.__stats["max_time"] = max(self.__stats["max_time"], elapsed)
+
+    def is_retryable(self, error):
+        return any(
+            candidate is not None and self.mapper.dialect.is_retryable(candidate)
+            for candidate in (error, error.__cause__)
+        )
+
+    def stats(self):
+        stats = dict(self.__stats)
+        stats["average_time"] = stats["total_time"] / stats["runs"] if stats["runs"] else 0.0
+        stats["retry_rate"] = stats["retries"] / stats["attempts"] if stats["attempts"] else 0.0
+        return stats
+
+    def __rollback(self):
+        try:
+            self.mapper.rollback()
+        except Exception:
+            pass
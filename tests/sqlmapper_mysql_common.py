@@ -2,7 +2,7 @@ import os
 import unittest
 from dataclasses import dataclass
 
-from sqlmapper import Mapper, MappingError
+from sqlmapper import KeyLoader, Mapper, MapperPool, MappingError, ResultMap, TransactionRunner
 
 
 @dataclass
@@ -219,6 +219,178 @@ class MySQLMapperTestMixin:
         self.assertEqual([row.id for row in rows_buffered], [row.id for row in rows_unbuffered])
         self.assertEqual([row.name for row in rows_buffered], [row.name for row in rows_unbuffered])
 
+    def test_select_all_with_tuple_rows(self):
+        with Mapper(self.DRIVER, tuple_rows=True, **self.connect_params) as mapper:
+            rows = list(
+                mapper.select_all(
+                    "SELECT id, name FROM users WHERE status = :status ORDER BY id",
+                    {"status": "active"},
+                    array_size=1,
+                    buffered=False,
+                )
+            )
+            user = mapper.select_one(
+                "SELECT id, name FROM users WHERE id = :id",
+                {"id": self.alice_id},
+                result_type=UserResult,
+            )
+        self.assertEqual([row.name for row in rows], ["Alice", "Bob"])
+        self.assertEqual(user.name, "Alice")
+
+    def test_prepared_statements_reuse_cursor_or_raise_when_unsupported(self):
+        if self.DRIVER.__name__ != "mysql.connector":
+            with self.assertRaisesRegex(MappingError, "Prepared statements are not supported"):
+                Mapper(self.DRIVER, prepared=True, **self.connect_params)
+            return
+        with Mapper(self.DRIVER, prepared=True, **self.connect_params) as mapper:
+            for _ in range(3):
+                user = mapper.select_one("SELECT id, name FROM users WHERE id = :id", {"id": self.alice_id})
+                self.assertEqual(user.name, "Alice")
+            rowcount = mapper.update(
+                "UPDATE users SET status = :status WHERE id = :id",
+                {"id": self.bob_id, "status": "inactive"},
+            )
+            rows = list(mapper.select_all("SELECT name FROM users ORDER BY id", buffered=False))
+            stats = mapper.prepared_stats()
+        self.assertEqual(rowcount, 1)
+        self.assertEqual([row.name for row in rows], ["Alice", "Bob"])
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (2, 3, 3))
+
+    def test_default_mapper_does_not_open_prepared_cursors(self):
+        with Mapper(self.DRIVER, **self.connect_params) as mapper:
+            cursor_params = []
+            open_cursor = mapper.connection.cursor
+
+            def cursor(*args, **kwargs):
+                cursor_params.append(kwargs)
+                return open_cursor(*args, **kwargs)
+
+            mapper.connection.cursor = cursor
+            mapper.update("UPDATE users SET status = :status WHERE id = :id", {"id": self.bob_id, "status": "inactive"})
+            user = mapper.select_one("SELECT id, status FROM users WHERE id = :id", {"id": self.bob_id})
+            stats = mapper.prepared_stats()
+        self.assertEqual(user.status, "inactive")
+        self.assertTrue(cursor_params)
+        self.assertFalse(any(params.get("prepared") for params in cursor_params))
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (0, 0, 0))
+
+    def test_select_all_closes_cursor_when_generator_is_abandoned(self):
+        rows = self.mapper.select_all("SELECT id, name FROM users ORDER BY id", array_size=1, buffered=False)
+        self.assertEqual(next(rows).name, "Alice")
+        rows.close()
+        self.mapper.update(
+            "UPDATE users SET status = :status WHERE id = :id",
+            {"id": self.bob_id, "status": "inactive"},
+        )
+        self.mapper.commit()
+        bob = self.mapper.select_one("SELECT status FROM users WHERE id = :id", {"id": self.bob_id})
+        self.assertEqual(bob.status, "inactive")
+
+    def test_reused_cursor_serves_writes_and_reads_next_to_open_generator(self):
+        with Mapper(self.DRIVER, reuse_cursors=True, **self.connect_params) as mapper:
+            rows = mapper.select_all("SELECT id, name FROM users ORDER BY id", array_size=1, buffered=True)
+            self.assertEqual(next(rows).name, "Alice")
+            for _ in range(3):
+                rowcount = mapper.update(
+                    "UPDATE users SET status = :status WHERE id = :id",
+                    {"id": self.bob_id, "status": "inactive"},
+                )
+                self.assertEqual(rowcount, 1)
+            bob = mapper.select_one("SELECT status FROM users WHERE id = :id", {"id": self.bob_id})
+            self.assertEqual(next(rows).name, "Bob")
+            rows.close()
+            mapper.rollback()
+            alice = mapper.select_one("SELECT name FROM users WHERE id = :id", {"id": self.alice_id})
+        self.assertEqual(bob.status, "inactive")
+        self.assertEqual(alice.name, "Alice")
+
+    def test_list_bind_variable_expands_in_clause(self):
+        for ids in ([self.alice_id], [self.alice_id, self.bob_id, 0], (self.bob_id, 0, -1, -2, -3)):
+            users = self.mapper.select_all("SELECT name FROM users WHERE id IN (:ids*) ORDER BY id", {"ids": ids})
+            expected = [name for id, name in ((self.alice_id, "Alice"), (self.bob_id, "Bob")) if id in ids]
+            self.assertEqual([user.name for user in users], expected)
+
+    def test_select_pages_walks_composite_keyset(self):
+        self.mapper.insert_many(
+            "INSERT INTO users (name, status) VALUES (:name, :status)",
+            [{"name": f"User{index}", "status": "ab"[index % 2]} for index in range(9)],
+        )
+        pages = list(
+            self.mapper.select_pages(
+                "SELECT id, name, status FROM users WHERE name LIKE :pattern",
+                {"pattern": "User%"},
+                key=("status", "id"),
+                page_size=4,
+            )
+        )
+        self.assertEqual([len(page) for page in pages], [4, 4, 1])
+        self.assertEqual(
+            [user.name for page in pages for user in page],
+            [f"User{index}" for index in (0, 2, 4, 6, 8, 1, 3, 5, 7)],
+        )
+
+    def test_select_scalar_and_select_column_return_raw_values(self):
+        self.assertEqual(self.mapper.select_scalar("SELECT COUNT(*) FROM users WHERE id = :id", {"id": self.bob_id}), 1)
+        with self.assertRaises(MappingError):
+            self.mapper.select_scalar("SELECT id FROM users")
+        expected = [user.id for user in self.mapper.select_all("SELECT id FROM users ORDER BY id")]
+        for buffered in (True, False):
+            ids = list(self.mapper.select_column("SELECT id FROM users ORDER BY id", array_size=1, buffered=buffered))
+            self.assertEqual(ids, expected)
+
+    def test_select_nested_groups_users_by_department(self):
+        sql = """
+            SELECT d.id, d.name, u.id AS user_id, u.name AS user_name
+            FROM departments d
+            JOIN users u ON u.department_id = d.id
+            ORDER BY d.id, u.id
+        """
+        result_map = ResultMap(collections={"users": ResultMap(prefix="user_")})
+        for ordered in (False, True):
+            departments = list(self.mapper.select_nested(sql, None, result_map, ordered=ordered, buffered=False))
+            self.assertEqual(
+                [(department.name, [user.name for user in department.users]) for department in departments],
+                [("Sales", ["Alice"]), ("Engineering", ["Bob"])],
+            )
+
+    def test_key_loader_loads_keys_in_one_batch(self):
+        loader = KeyLoader(self.mapper, "SELECT id, name FROM users WHERE id IN (:keys*)")
+        users = loader.get_many([self.bob_id, -1, self.alice_id])
+        self.assertEqual([user and user.name for user in users], ["Bob", None, "Alice"])
+        self.assertEqual(loader.batches, 1)
+
+    def test_transaction_runner_replays_retryable_errors(self):
+        attempts = []
+
+        def rename(mapper):
+            attempts.append(None)
+            mapper.update("UPDATE users SET name = :name WHERE id = :id", {"id": self.bob_id, "name": "Robert"})
+            if len(attempts) == 1:
+                mapper.execute("SIGNAL SQLSTATE '40001' SET MESSAGE_TEXT = 'conflict', MYSQL_ERRNO = 1213")
+
+        runner = TransactionRunner(self.mapper, base_delay=0)
+        runner.run(rename)
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(runner.stats()["retries"], 1)
+        name = self.mapper.select_scalar("SELECT name FROM users WHERE id = :id", {"id": self.bob_id})
+        self.assertEqual(name, "Robert")
+
+    def test_select_parallel_merges_partitions_in_key_order(self):
+        self.mapper.insert_many(
+            "INSERT INTO users (name, status) VALUES (:name, :status)",
+            [{"name": f"User{index}", "status": "active"} for index in range(20)],
+        )
+        self.mapper.commit()
+        expected = [user.id for user in self.mapper.select_all("SELECT id FROM users ORDER BY id")]
+        with MapperPool(self.DRIVER, min_size=0, max_size=3, **self.connect_params) as pool:
+            for partition_by in ("modulo", "range"):
+                users = list(
+                    pool.select_parallel(
+                        "SELECT id, name FROM users", partitions=3, ordered=True, partition_by=partition_by
+                    )
+                )
+                self.assertEqual([user.id for user in users], expected)
+
     def test_select_one_with_result_type(self):
         row = self.mapper.select_one(
             "SELECT id, name FROM users WHERE id = :id",
@@ -320,6 +492,26 @@ class MySQLMapperTestMixin:
         self.assertEqual(deleted_bob, 0)
         self.assertEqual(deleted_alice, 1)
 
+    def test_insert_many_update_many_and_delete_many_return_total_rowcount(self):
+        inserted = self.mapper.insert_many(
+            "INSERT INTO users (name, status) VALUES (:name, :status)",
+            [NewUser(name="User{0}".format(index), status="batch") for index in range(5)],
+            batch_size=2,
+        )
+        updated = self.mapper.update_many(
+            "UPDATE users SET status = :status WHERE name = :name",
+            ({"name": "User{0}".format(index), "status": "done"} for index in range(3)),
+            batch_size=2,
+        )
+        deleted = self.mapper.delete_many(
+            "DELETE FROM users WHERE status = :status",
+            [{"status": "done"}, {"status": "batch"}],
+        )
+        self.mapper.commit()
+        self.assertEqual(inserted, 5)
+        self.assertEqual(updated, 3)
+        self.assertEqual(deleted, 5)
+
     def test_execute_can_run_special_sql(self):
         self.mapper.execute("ALTER TABLE users ADD COLUMN profile TEXT NULL")
         self.mapper.commit()
@@ -0,0 +1,706 @@
+import os
+import unittest
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlmapper import KeyLoader, Mapper, MapperPool, MappingError, ResultMap, TransactionRunner
+
+
+@dataclass
+class UserQuery:
+    min_id: int
+    max_id: int
+    status: str
+
+
+class UserResult:
+    def __init__(self):
+        self.id = None
+        self.name = None
+
+
+class NewUser:
+    def __init__(self, id=None, name=None, status=None):
+        self.id = id
+        self.name = name
+        self.status = status
+
+
+class UserStatusUpdate:
+    def __init__(self, id, status, updated_at):
+        self.id = id
+        self.status = status
+        self.updated_at = updated_at
+
+
+class UserDeleteParam:
+    def __init__(self, id):
+        self.id = id
+
+
+class ResultTypeNeedsArg:
+    def __init__(self, value):
+        self.value = value
+
+
+class PostgreSQLMapperTestMixin:
+    DRIVER = None
+    DRIVER_MISSING_REASON = "driver is not installed"
+
+    @classmethod
+    def setUpClass(cls):
+        if cls.DRIVER is None:
+            raise unittest.SkipTest(cls.DRIVER_MISSING_REASON)
+
+        env = os.environ
+        required = [
+            "PGHOST",
+            "PGPORT",
+            "PGUSER",
+            "PGPASSWORD",
+            "PGDATABASE",
+        ]
+        missing = [name for name in required if not env.get(name)]
+        if missing:
+            raise unittest.SkipTest(
+                "PostgreSQL test env is not configured. Missing: {0}".format(", ".join(missing))
+            )
+
+        cls.connect_params = {
+            "host": env["PGHOST"],
+            "port": int(env["PGPORT"]),
+            "user": env["PGUSER"],
+            "password": env["PGPASSWORD"],
+            "dbname": env["PGDATABASE"],
+        }
+
+    def setUp(self):
+        self.mapper = Mapper(self.DRIVER, **self.connect_params)
+        self._drop_tables()
+        self._create_tables()
+        self._seed_data()
+
+    def tearDown(self):
+        try:
+            self._drop_tables()
+            self.mapper.commit()
+        finally:
+            self.mapper.close()
+
+    def _drop_tables(self):
+        for table in ("audit_logs", "accounts", "users", "departments", "external_keys"):
+            self.mapper.execute("DROP TABLE IF EXISTS {0} CASCADE".format(table))
+
+    def _create_tables(self):
+        self.mapper.execute(
+            """
+            CREATE TABLE departments (
+                id BIGSERIAL PRIMARY KEY,
+                name VARCHAR(255) NOT NULL
+            )
+            """
+        )
+        self.mapper.execute(
+            """
+            CREATE TABLE users (
+                id BIGSERIAL PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                status VARCHAR(64) NOT NULL,
+                updated_at TIMESTAMP NULL,
+                department_id BIGINT NULL,
+                used_flag SMALLINT NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self.mapper.execute(
+            """
+            CREATE TABLE accounts (
+                id BIGINT PRIMARY KEY,
+                balance BIGINT NOT NULL
+            )
+            """
+        )
+        self.mapper.execute(
+            """
+            CREATE TABLE audit_logs (
+                job_id BIGINT PRIMARY KEY,
+                processed SMALLINT NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self.mapper.commit()
+
+    def _seed_data(self):
+        sales = self.mapper.select_one(
+            "INSERT INTO departments (name) VALUES (:name) RETURNING id",
+            {"name": "Sales"},
+        )
+        engineering = self.mapper.select_one(
+            "INSERT INTO departments (name) VALUES (:name) RETURNING id",
+            {"name": "Engineering"},
+        )
+
+        alice = self.mapper.select_one(
+            """
+            INSERT INTO users (name, status, updated_at, department_id, used_flag)
+            VALUES (:name, :status, :updated_at, :department_id, :used_flag)
+            RETURNING id
+            """,
+            {
+                "name": "Alice",
+                "status": "active",
+                "updated_at": "2026-03-01 09:00:00",
+                "department_id": sales.id,
+                "used_flag": 0,
+            },
+        )
+        bob = self.mapper.select_one(
+            """
+            INSERT INTO users (name, status, updated_at, department_id, used_flag)
+            VALUES (:name, :status, :updated_at, :department_id, :used_flag)
+            RETURNING id
+            """,
+            {
+                "name": "Bob",
+                "status": "active",
+                "updated_at": "2026-03-01 09:00:00",
+                "department_id": engineering.id,
+                "used_flag": 1,
+            },
+        )
+        self.alice_id = alice.id
+        self.bob_id = bob.id
+        self.mapper.insert(
+            "INSERT INTO accounts (id, balance) VALUES (:id, :balance)",
+            {"id": 1, "balance": 5000},
+        )
+        self.mapper.insert(
+            "INSERT INTO accounts (id, balance) VALUES (:id, :balance)",
+            {"id": 2, "balance": 1000},
+        )
+        self.mapper.insert(
+            "INSERT INTO audit_logs (job_id, processed) VALUES (:job_id, :processed)",
+            {"job_id": 1, "processed": 0},
+        )
+        self.mapper.commit()
+
+    def test_select_all_accepts_dataclass_and_dict(self):
+        query = UserQuery(min_id=1, max_id=100, status="active")
+        rows_from_obj = list(
+            self.mapper.select_all(
+                """
+                SELECT id, name
+                  FROM users
+                 WHERE id BETWEEN :min_id AND :max_id
+                   AND status = :status
+                """,
+                query,
+            )
+        )
+        rows_from_dict = list(
+            self.mapper.select_all(
+                """
+                SELECT id, name
+                  FROM users
+                 WHERE id BETWEEN :min_id AND :max_id
+                   AND status = :status
+                """,
+                {"min_id": 1, "max_id": 100, "status": "active"},
+            )
+        )
+        self.assertEqual(len(rows_from_obj), 2)
+        self.assertEqual(len(rows_from_dict), 2)
+
+    def test_select_all_works_with_buffered_true_and_false(self):
+        rows_buffered = list(
+            self.mapper.select_all(
+                "SELECT id, name FROM users WHERE status = :status ORDER BY id",
+                {"status": "active"},
+                array_size=1,
+                buffered=True,
+            )
+        )
+        rows_unbuffered = list(
+            self.mapper.select_all(
+                "SELECT id, name FROM users WHERE status = :status ORDER BY id",
+                {"status": "active"},
+                array_size=1,
+                buffered=False,
+            )
+        )
+        self.assertEqual([row.id for row in rows_buffered], [row.id for row in rows_unbuffered])
+        self.assertEqual([row.name for row in rows_buffered], [row.name for row in rows_unbuffered])
+
+    def test_select_all_nested_unbuffered_queries_can_run_without_cursor_name_conflict(self):
+        # Add enough rows to force incremental fetch when array_size=1.
+        for i in range(3):
+            self.mapper.insert(
+                "INSERT INTO users (name, status, updated_at, department_id, used_flag) VALUES (:name, :status, :updated_at, :department_id, :used_flag)",
+                {
+                    "name": f"Nested-{i}",
+                    "status": "active",
+                    "updated_at": "2026-03-01 09:00:00",
+                    "department_id": None,
+                    "used_flag": 0,
+                },
+            )
+        self.mapper.commit()
+
+        outer_count = 0
+        for _ in self.mapper.select_all(
+            "SELECT id, name FROM users WHERE status = :status ORDER BY id",
+            {"status": "active"},
+            array_size=1,
+            buffered=False,
+        ):
+            balances = [
+                row.balance
+                for row in self.mapper.select_all(
+                    "SELECT id, balance FROM accounts ORDER BY id",
+                    array_size=1,
+                    buffered=False,
+                )
+            ]
+            self.assertEqual(balances, [5000, 1000])
+            outer_count += 1
+
+        self.assertGreaterEqual(outer_count, 5)
+
+    def test_select_all_with_tuple_rows(self):
+        with Mapper(self.DRIVER, tuple_rows=True, **self.connect_params) as mapper:
+            rows = list(
+                mapper.select_all(
+                    "SELECT id, name FROM users WHERE status = :status ORDER BY id",
+                    {"status": "active"},
+                    array_size=1,
+                    buffered=False,
+                )
+            )
+            user = mapper.select_one(
+                "SELECT id, name FROM users WHERE id = :id",
+                {"id": self.alice_id},
+                result_type=UserResult,
+            )
+        self.assertEqual([row.name for row in rows], ["Alice", "Bob"])
+        self.assertEqual(user.name, "Alice")
+
+    def test_select_all_unbuffered_uses_server_side_cursor_and_closes_it_when_abandoned(self):
+        rows = self.mapper.select_all("SELECT id, name FROM users ORDER BY id", array_size=1, buffered=False)
+        self.assertEqual(next(rows).name, "Alice")
+        open_cursors = list(self.mapper.select_all("SELECT name FROM pg_cursors WHERE name LIKE 'sqlmapper_%'"))
+        self.assertEqual(len(open_cursors), 1)
+        rows.close()
+        open_cursors = list(self.mapper.select_all("SELECT name FROM pg_cursors WHERE name LIKE 'sqlmapper_%'"))
+        self.assertEqual(open_cursors, [])
+
+    def test_prepared_statements_are_prepared_once_and_deallocated_when_evicted(self):
+        with Mapper(self.DRIVER, prepared=True, **self.connect_params) as mapper:
+            mapper.max_prepared_statements = 2
+            for _ in range(3):
+                user = mapper.select_one("SELECT id, name FROM users WHERE id = :id", {"id": self.alice_id})
+                self.assertEqual(user.name, "Alice")
+            rowcount = mapper.update(
+                "UPDATE users SET status = :status WHERE id = :id",
+                {"id": self.bob_id, "status": "inactive"},
+            )
+            mapper.rollback()
+            rows = list(mapper.select_all("SELECT name FROM users WHERE name LIKE 'A%%'", buffered=False))
+            prepared = list(mapper.select_all("SELECT statement FROM pg_prepared_statements ORDER BY statement"))
+            stats = mapper.prepared_stats()
+        self.assertEqual(rowcount, 1)
+        self.assertEqual([row.name for row in rows], ["Alice"])
+        self.assertIn(len(prepared), (1, 2))
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 3, 1))
+
+    def test_reused_cursor_serves_writes_and_reads_next_to_open_generator(self):
+        with Mapper(self.DRIVER, reuse_cursors=True, **self.connect_params) as mapper:
+            rows = mapper.select_all("SELECT id, name FROM users ORDER BY id", array_size=1, buffered=False)
+            self.assertEqual(next(rows).name, "Alice")
+            for _ in range(3):
+                rowcount = mapper.update(
+                    "UPDATE users SET status = :status WHERE id = :id",
+                    {"id": self.bob_id, "status": "inactive"},
+                )
+                self.assertEqual(rowcount, 1)
+            bob = mapper.select_one("SELECT status FROM users WHERE id = :id", {"id": self.bob_id})
+            self.assertEqual(next(rows).name, "Bob")
+            rows.close()
+            mapper.rollback()
+            alice = mapper.select_one("SELECT name FROM users WHERE id = :id", {"id": self.alice_id})
+        self.assertEqual(bob.status, "inactive")
+        self.assertEqual(alice.name, "Alice")
+
+    def test_copy_in_streams_dicts_and_objects(self):
+        def users():
+            yield {"name": 'Carol "C"', "status": "active", "updated_at": None}
+            dave = NewUser(name="Dave,\nD", status="inactive")
+            dave.updated_at = None
+            yield dave
+            for index in range(1000):
+                yield {"name": f"User{index}", "status": "", "updated_at": "2024-01-02 03:04:05"}
+
+        rowcount = self.mapper.copy_in("users", ["name", "status", "updated_at"], users())
+        self.mapper.commit()
+        carol = self.mapper.select_one(
+            "SELECT status, updated_at FROM users WHERE name = :name", {"name": 'Carol "C"'}
+        )
+        dave = self.mapper.select_one("SELECT status FROM users WHERE name = :name", {"name": "Dave,\nD"})
+        count = self.mapper.select_one("SELECT COUNT(*) AS count FROM users WHERE status = ''").count
+        self.assertEqual(rowcount, 1002)
+        self.assertEqual((carol.status, carol.updated_at), ("active", None))
+        self.assertEqual(dave.status, "inactive")
+        self.assertEqual(count, 1000)
+
+    def test_copy_in_reads_columns_that_are_not_plain_identifiers(self):
+        self.mapper.execute('CREATE TEMPORARY TABLE quoted_columns ("Order" INTEGER, "user-name" TEXT)')
+        count = self.mapper.copy_in(
+            "quoted_columns", ['"Order"', '"user-name"'], [{'"Order"': 1, '"user-name"': "Alice"}]
+        )
+        row = self.mapper.select_one('SELECT "Order" AS position, "user-name" AS name FROM quoted_columns')
+        self.assertEqual((count, row.position, row.name), (1, 1, "Alice"))
+
+    def test_copy_out_yields_mapped_results_and_raw_csv(self):
+        self.mapper.update(
+            "UPDATE users SET name = :name WHERE id = :id",
+            {"id": self.bob_id, "name": "Bob\tthe \\ builder\n"},
+        )
+        users = list(
+            self.mapper.copy_out(
+                "SELECT id, name FROM users WHERE status = :status ORDER BY id",
+                {"status": "active"},
+                result_type=UserResult,
+            )
+        )
+        csv = "".join(
+            self.mapper.copy_out("SELECT id, name FROM users WHERE id = :id", {"id": self.alice_id}, raw=True)
+        )
+        self.assertEqual([user.name for user in users], ["Alice", "Bob\tthe \\ builder\n"])
+        self.assertEqual([user.id for user in users], [self.alice_id, self.bob_id])
+        self.assertEqual(csv, f"id,name\n{self.alice_id},Alice\n")
+
+    def test_copy_out_converts_values_by_column_type(self):
+        self.mapper.update("UPDATE users SET department_id = NULL WHERE id = :id", {"id": self.bob_id})
+        users = list(
+            self.mapper.copy_out(
+                """
+                SELECT id, updated_at, department_id, used_flag, used_flag = 1 AS used, ARRAY[name, status] AS tags
+                FROM users ORDER BY id
+                """
+            )
+        )
+        self.assertEqual(users[0].updated_at, datetime(2026, 3, 1, 9, 0))
+        self.assertIsInstance(users[0].department_id, int)
+        self.assertEqual(
+            [(user.id, user.department_id, user.used_flag, user.used, user.tags) for user in users[1:]],
+            [(self.bob_id, None, 1, True, ["Bob", "active"])],
+        )
+
+    def test_copy_out_leaves_connection_usable_when_abandoned(self):
+        self.mapper.copy_in(
+            "users", ["name", "status"], ({"name": f"User{index}", "status": "active"} for index in range(5000))
+        )
+        rows = self.mapper.copy_out("SELECT id, name FROM users ORDER BY id")
+        self.assertEqual(next(rows).name, "Alice")
+        rows.close()
+        count = self.mapper.select_one("SELECT COUNT(*) AS count FROM users").count
+        self.assertEqual(count, 5002)
+
+    def test_copy_out_rejects_other_calls_while_in_progress(self):
+        rows = self.mapper.copy_out("SELECT id, name FROM users ORDER BY id")
+        self.assertEqual(next(rows).name, "Alice")
+        try:
+            with self.assertRaisesRegex(MappingError, "copy_out is in progress"):
+                self.mapper.select_one("SELECT name FROM users WHERE id = :id", {"id": self.bob_id})
+            with self.assertRaisesRegex(MappingError, "copy_out is in progress"):
+                self.mapper.commit()
+            with self.assertRaisesRegex(MappingError, "copy_out is in progress"):
+                next(self.mapper.copy_out("SELECT id FROM users"))
+        finally:
+            rows.close()
+        user = self.mapper.select_one("SELECT name FROM users WHERE id = :id", {"id": self.bob_id})
+        self.assertEqual(user.name, "Bob")
+
+    def test_returning_all_unbuffered_uses_regular_cursor_for_writes(self):
+        users = list(
+            self.mapper.returning_all(
+                "UPDATE users SET status = :status WHERE id IN (:ids*) RETURNING id, status",
+                {"status": "inactive", "ids": [self.alice_id, self.bob_id]},
+                buffered=False,
+            )
+        )
+        self.assertEqual(
+            sorted((user.id, user.status) for user in users), [(self.alice_id, "inactive"), (self.bob_id, "inactive")]
+        )
+        names = list(self.mapper.select_column("SELECT name FROM users ORDER BY id", buffered=False))
+        self.assertEqual(names, ["Alice", "Bob"])
+
+    def test_list_bind_variable_expands_in_clause(self):
+        for ids in ([self.alice_id], [self.alice_id, self.bob_id, 0], (self.bob_id, 0, -1, -2, -3)):
+            users = self.mapper.select_all("SELECT name FROM users WHERE id IN (:ids*) ORDER BY id", {"ids": ids})
+            expected = [name for id, name in ((self.alice_id, "Alice"), (self.bob_id, "Bob")) if id in ids]
+            self.assertEqual([user.name for user in users], expected)
+
+    def test_select_pages_walks_composite_keyset(self):
+        self.mapper.insert_many(
+            "INSERT INTO users (name, status) VALUES (:name, :status)",
+            [{"name": f"User{index}", "status": "ab"[index % 2]} for index in range(9)],
+        )
+        pages = list(
+            self.mapper.select_pages(
+                "SELECT id, name, status FROM users WHERE name LIKE :pattern",
+                {"pattern": "User%"},
+                key=("status", "id"),
+                page_size=4,
+            )
+        )
+        self.assertEqual([len(page) for page in pages], [4, 4, 1])
+        self.assertEqual(
+            [user.name for page in pages for user in page],
+            [f"User{index}" for index in (0, 2, 4, 6, 8, 1, 3, 5, 7)],
+        )
+
+    def test_select_scalar_and_select_column_return_raw_values(self):
+        self.assertEqual(self.mapper.select_scalar("SELECT COUNT(*) FROM users WHERE id = :id", {"id": self.bob_id}), 1)
+        with self.assertRaises(MappingError):
+            self.mapper.select_scalar("SELECT id FROM users")
+        expected = [user.id for user in self.mapper.select_all("SELECT id FROM users ORDER BY id")]
+        for buffered in (True, False):
+            ids = list(self.mapper.select_column("SELECT id FROM users ORDER BY id", array_size=1, buffered=buffered))
+            self.assertEqual(ids, expected)
+
+    def test_select_nested_groups_users_by_department(self):
+        sql = """
+            SELECT d.id, d.name, u.id AS user_id, u.name AS user_name
+            FROM departments d
+            JOIN users u ON u.department_id = d.id
+            ORDER BY d.id, u.id
+        """
+        result_map = ResultMap(collections={"users": ResultMap(prefix="user_")})
+        for ordered in (False, True):
+            departments = list(self.mapper.select_nested(sql, None, result_map, ordered=ordered, buffered=False))
+            self.assertEqual(
+                [(department.name, [user.name for user in department.users]) for department in departments],
+                [("Sales", ["Alice"]), ("Engineering", ["Bob"])],
+            )
+
+    def test_key_loader_loads_keys_in_one_batch(self):
+        loader = KeyLoader(self.mapper, "SELECT id, name FROM users WHERE id IN (:keys*)")
+        users = loader.get_many([self.bob_id, -1, self.alice_id])
+        self.assertEqual([user and user.name for user in users], ["Bob", None, "Alice"])
+        self.assertEqual(loader.batches, 1)
+
+    def test_transaction_runner_replays_retryable_errors(self):
+        attempts = []
+
+        def rename(mapper):
+            attempts.append(None)
+            mapper.update("UPDATE users SET name = :name WHERE id = :id", {"id": self.bob_id, "name": "Robert"})
+            if len(attempts) == 1:
+                mapper.execute("DO $$ BEGIN RAISE EXCEPTION 'conflict' USING ERRCODE = '40001'; END $$")
+
+        runner = TransactionRunner(self.mapper, base_delay=0)
+        runner.run(rename)
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(runner.stats()["retries"], 1)
+        name = self.mapper.select_scalar("SELECT name FROM users WHERE id = :id", {"id": self.bob_id})
+        self.assertEqual(name, "Robert")
+
+    def test_select_parallel_merges_partitions_in_key_order(self):
+        self.mapper.insert_many(
+            "INSERT INTO users (name, status) VALUES (:name, :status)",
+            [{"name": f"User{index}", "status": "active"} for index in range(20)],
+        )
+        self.mapper.commit()
+        expected = [user.id for user in self.mapper.select_all("SELECT id FROM users ORDER BY id")]
+        with MapperPool(self.DRIVER, min_size=0, max_size=3, **self.connect_params) as pool:
+            for partition_by in ("modulo", "range"):
+                users = list(
+                    pool.select_parallel(
+                        "SELECT id, name FROM users", partitions=3, ordered=True, partition_by=partition_by
+                    )
+                )
+                self.assertEqual([user.id for user in users], expected)
+
+    def test_select_one_with_result_type(self):
+        row = self.mapper.select_one(
+            "SELECT id, name FROM users WHERE id = :id",
+            {"id": self.alice_id},
+            result_type=UserResult,
+        )
+        self.assertEqual(row.name, "Alice")
+
+    def test_select_one_returns_none_when_no_rows(self):
+        none_row = self.mapper.select_one(
+            "SELECT id, name FROM users WHERE id = :id",
+            {"id": 99999999},
+        )
+        self.assertIsNone(none_row)
+
+    def test_select_one_raises_mapping_error_when_multiple_rows(self):
+        with self.assertRaises(MappingError):
+            self.mapper.select_one(
+                "SELECT id, name FROM users WHERE status = :status",
+                {"status": "active"},
+            )
+
+    def test_select_one_raises_mapping_error_when_result_type_missing_attribute(self):
+        with self.assertRaises(MappingError):
+            self.mapper.select_one(
+                "SELECT id, status FROM users WHERE id = :id",
+                {"id": self.alice_id},
+                result_type=UserResult,
+            )
+
+    def test_select_one_raises_mapping_error_when_bind_variable_missing(self):
+        with self.assertRaises(MappingError):
+            self.mapper.select_one(
+                "SELECT id, name FROM users WHERE id = :id AND status = :status",
+                {"id": self.alice_id},
+            )
+
+    def test_select_one_raises_mapping_error_when_result_type_requires_args(self):
+        with self.assertRaises(MappingError):
+            self.mapper.select_one(
+                "SELECT id, name FROM users WHERE id = :id",
+                {"id": self.alice_id},
+                result_type=ResultTypeNeedsArg,
+            )
+
+    def test_insert_returns_driver_dependent_lastrowid(self):
+        new_user = NewUser(name="Carol", status="active")
+        new_user.id = self.mapper.insert(
+            "INSERT INTO users (name, status) VALUES (:name, :status)",
+            new_user,
+        )
+        self.assertIn(type(new_user.id), (int, type(None)))
+
+    def test_insert_without_auto_increment_returns_none_or_zero(self):
+        self.mapper.execute(
+            """
+            CREATE TABLE external_keys (
+                code VARCHAR(64) PRIMARY KEY
+            )
+            """
+        )
+        lastrowid = self.mapper.insert(
+            "INSERT INTO external_keys (code) VALUES (:code)",
+            {"code": "A001"},
+        )
+        self.assertIn(lastrowid, (None, 0))
+
+    def test_update_returns_rowcount_for_optimistic_lock_check(self):
+        updated_ok = self.mapper.update(
+            """
+            UPDATE users
+               SET status = :status
+             WHERE id = :id
+               AND updated_at = :updated_at
+            """,
+            UserStatusUpdate(self.alice_id, "inactive", "2026-03-01 09:00:00"),
+        )
+        updated_ng = self.mapper.update(
+            """
+            UPDATE users
+               SET status = :status
+             WHERE id = :id
+               AND updated_at = :updated_at
+            """,
+            UserStatusUpdate(self.alice_id, "active", "2099-01-01 00:00:00"),
+        )
+        self.assertEqual(updated_ok, 1)
+        self.assertEqual(updated_ng, 0)
+
+    def test_delete_returns_rowcount_with_business_condition(self):
+        deleted_bob = self.mapper.delete(
+            "DELETE FROM users WHERE id = :id AND used_flag = 0",
+            UserDeleteParam(self.bob_id),
+        )
+        deleted_alice = self.mapper.delete(
+            "DELETE FROM users WHERE id = :id AND used_flag = 0",
+            UserDeleteParam(self.alice_id),
+        )
+        self.assertEqual(deleted_bob, 0)
+        self.assertEqual(deleted_alice, 1)
+
+    def test_insert_many_update_many_and_delete_many_return_total_rowcount(self):
+        inserted = self.mapper.insert_many(
+            "INSERT INTO users (name, status) VALUES (:name, :status)",
+            [NewUser(name="User{0}".format(index), status="batch") for index in range(5)],
+            batch_size=2,
+        )
+        updated = self.mapper.update_many(
+            "UPDATE users SET status = :status WHERE name = :name",
+            ({"name": "User{0}".format(index), "status": "done"} for index in range(3)),
+            batch_size=2,
+        )
+        deleted = self.mapper.delete_many(
+            "DELETE FROM users WHERE status = :status",
+            [{"status": "done"}, {"status": "batch"}],
+        )
+        self.mapper.commit()
+        self.assertEqual(inserted, 5)
+        self.assertEqual(updated, 3)
+        self.assertEqual(deleted, 5)
+
+    def test_execute_can_run_special_sql(self):
+        self.mapper.execute("ALTER TABLE users ADD COLUMN profile TEXT NULL")
+        self.mapper.commit()
+        row = self.mapper.select_one(
+            """
+            SELECT column_name
+              FROM information_schema.columns
+             WHERE table_name = :table_name
+               AND column_name = :column_name
+            """,
+            {"table_name": "users", "column_name": "profile"},
+        )
+        self.assertIsNotNone(row)
+
+    def test_transaction_commit_and_explicit_rollback_on_reused_mapper(self):
+        self.mapper.update(
+            "UPDATE accounts SET balance = balance - :amount WHERE id = :from_id",
+            {"amount": 1000, "from_id": 1},
+        )
+        self.mapper.update(
+            "UPDATE accounts SET balance = balance + :amount WHERE id = :to_id",
+            {"amount": 1000, "to_id": 2},
+        )
+        self.mapper.commit()
+
+        try:
+            self.mapper.update(
+                "UPDATE users SET status = :status WHERE id = :id",
+                {"id": self.bob_id, "status": "inactive"},
+            )
+            self.mapper.update(
+                "UPDATE audit_logs SET processed = 1 WHERE job_id = :job_id",
+                {"job_id": 1},
+            )
+            raise RuntimeError("simulate failure")
+        except Exception:
+            self.mapper.rollback()
+
+        account1 = self.mapper.select_one("SELECT id, balance FROM accounts WHERE id = :id", {"id": 1})
+        account2 = self.mapper.select_one("SELECT id, balance FROM accounts WHERE id = :id", {"id": 2})
+        bob = self.mapper.select_one("SELECT id, status FROM users WHERE id = :id", {"id": self.bob_id})
+        log = self.mapper.select_one("SELECT job_id, processed FROM audit_logs WHERE job_id = :job_id", {"job_id": 1})
+        self.assertEqual(account1.balance, 4000)
+        self.assertEqual(account2.balance, 2000)
+        self.assertEqual(bob.status, "active")
+        self.assertEqual(log.processed, 0)
+
+    def test_uncommitted_changes_are_rolled_back_when_exiting_with_by_exception(self):
+        with self.assertRaises(RuntimeError):
+            with Mapper(self.DRIVER, **self.connect_params) as mapper:
+                mapper.update(
+                    "UPDATE users SET status = :status WHERE id = :id",
+                    {"id": self.bob_id, "status": "inactive"},
+                )
+                raise RuntimeError("simulate failure")
+
+        with Mapper(self.DRIVER, **self.connect_params) as checker:
+            user = checker.select_one(
+                "SELECT id, status FROM users WHERE id = :id",
+                {"id": self.bob_id},
+            )
+        self.assertEqual(user.status, "active")
@@ -0,0 +1,33 @@
+import unittest
+
+from tests.sqlmapper_postgresql_common import PostgreSQLMapperTestMixin
+
+try:
+    import psycopg
+except Exception:  # pragma: no cover - depends on local environment
+    psycopg = None
+
+
+class TestPsycopgMapper(PostgreSQLMapperTestMixin, unittest.TestCase):
+    DRIVER = psycopg
+    DRIVER_MISSING_REASON = "psycopg is not installed"
+
+    def test_insert_many_in_pipeline_mode_returns_total_rowcount(self):
+        rowcount = self.mapper.insert_many(
+            "INSERT INTO users (name, status) VALUES (:name, :status)",
+            ({"name": f"User{index}", "status": "active"} for index in range(5)),
+            batch_size=2,
+        )
+        self.mapper.commit()
+        count = self.mapper.select_one("SELECT COUNT(*) AS count FROM users WHERE name LIKE 'User%%'").count
+        self.assertEqual(rowcount, 5)
+        self.assertEqual(count, 5)
+        self.assertIsNone(
+            self.mapper.insert(
+                "INSERT INTO users (name, status) VALUES (:name, :status)", {"name": "Carol", "status": "active"}
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,41 @@
+import asyncio
+import functools
 import os
+import pickle
 import sqlite3
 import tempfile
+import threading
+import types
 import unittest
 from dataclasses import dataclass
 
-from sqlmapper import Mapper, MappingError
+try:
+    import numpy
+except Exception:  # pragma: no cover - depends on local environment
+    numpy = None
+
+from sqlmapper import (
+    AsyncMapper,
+    Dialect,
+    DriverOperationalError,
+    DriverProgrammingError,
+    FetchStats,
+    KeyLoader,
+    LazyResult,
+    LRUCache,
+    Mapper,
+    MapperPool,
+    MappingError,
+    PageCheckpoint,
+    PoolTimeoutError,
+    Result,
+    ResultCache,
+    ResultMap,
+    SQLite3Dialect,
+    Statement,
+    StatementListener,
+    TransactionRunner,
+)
 
 
 @dataclass
@@ -39,16 +70,92 @@ class UserDeleteParam:
         self.id = id
 
 
+class SlotUserResult:
+    __slots__ = ("id", "name")
+
+    def __init__(self):
+        self.id = None
+        self.name = None
+
+
+class PropertyUserResult:
+    def __init__(self):
+        self.id = None
+        self._name = None
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = value.upper()
+
+
+@dataclass
+class DataclassUserResult:
+    id: int = None
+    name: str = None
+
+
+@dataclass(init=False)
+class NoInitDataclassUserResult:
+    id: int = None
+    name: str = None
+
+    def __init__(self):
+        self.loaded = True
+
+
+class CustomInitDataclassUserResult(DataclassUserResult):
+    def __init__(self):
+        super().__init__()
+        self.loaded = True
+
+
+class RecordingListener(StatementListener):
+    def __init__(self):
+        self.events = []
+
+    def before_execute(self, event):
+        self.events.append(("before_execute", event.sql, event.parameter_count))
+
+    def after_execute(self, event):
+        self.events.append(("after_execute", event.sql, event.rowcount))
+
+    def after_fetch(self, event):
+        self.events.append(("after_fetch", event.sql, event.chunk_rows))
+
+    def after_mapping(self, event):
+        self.events.append(("after_mapping", event.sql, event.rows))
+
+    def error(self, event):
+        self.events.append(("error", event.sql, type(event.error)))
+
+
+class CountingConnection(sqlite3.Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursors = []
+
+    def cursor(self, *args, **kwargs):
+        cursor = super().cursor(*args, **kwargs)
+        self.cursors.append(cursor)
+        return cursor
+
+
 class ResultTypeNeedsArg:
     def __init__(self, value):
         self.value = value
 
 
 class TestSQLite3Mapper(unittest.TestCase):
+    MAPPER_PARAMS = {}
+
     def setUp(self):
         self.tempdir = tempfile.TemporaryDirectory(prefix="psm_sqlite3_")
         self.db_path = os.path.join(self.tempdir.name, "sample.db")
-        self.mapper = Mapper(sqlite3, database=self.db_path)
+        self.mapper = Mapper(sqlite3, database=self.db_path, **self.MAPPER_PARAMS)
 
         self.mapper.execute(
             """
@@ -191,6 +298,170 @@ class TestSQLite3Mapper(unittest.TestCase):
         self.assertEqual([row.id for row in rows_buffered], [row.id for row in rows_unbuffered])
         self.assertEqual([row.name for row in rows_buffered], [row.name for row in rows_unbuffered])
 
+    def test_select_all_adaptive_array_size_grows_and_respects_memory_budget(self):
+        self.mapper.insert_many(
+            "INSERT INTO users (name, status) VALUES (:name, :status)",
+            [{"name": "User{0}".format(index), "status": "batch"} for index in range(998)],
+        )
+        stats = FetchStats()
+        rows = list(self.mapper.select_all("SELECT id, name FROM users", array_size="auto", stats=stats))
+        self.assertEqual(len(rows), 1000)
+        self.assertEqual(stats.row_count, 1000)
+        self.assertEqual(stats.max_array_size, 512)
+        self.assertEqual(stats.fetch_count, 7)
+        self.assertGreater(stats.row_bytes, 0)
+
+        self.mapper.fetch_memory_budget = stats.row_bytes * 20
+        stats = FetchStats()
+        rows = list(self.mapper.select_all("SELECT id, name FROM users", array_size="auto", stats=stats))
+        self.assertEqual(len(rows), 1000)
+        self.assertLess(stats.max_array_size, 32)
+
+    def test_listener_receives_statement_lifecycle_events(self):
+        listener = RecordingListener()
+        self.mapper.add_listener(listener)
+        sql = "SELECT id, name FROM users WHERE status = :status"
+        rows = list(self.mapper.select_all(sql, {"status": "active"}, array_size=1))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(
+            listener.events,
+            [
+                ("before_execute", sql, 1),
+                ("after_execute", sql, -1),
+                ("after_fetch", sql, 1),
+                ("after_fetch", sql, 1),
+                ("after_fetch", sql, 0),
+                ("after_mapping", sql, 2),
+            ],
+        )
+
+        listener.events = []
+        update = "UPDATE users SET status = :status WHERE id = :id"
+        self.mapper.update(update, {"id": self.alice_id, "status": "inactive"})
+        with self.assertRaises(DriverOperationalError):
+            self.mapper.execute("SELECT missing FROM users")
+        self.assertEqual(
+            listener.events,
+            [
+                ("before_execute", update, 2),
+                ("after_execute", update, 1),
+                ("before_execute", "SELECT missing FROM users", 0),
+                ("error", "SELECT missing FROM users", DriverOperationalError),
+            ],
+        )
+
+        self.mapper.remove_listener(listener)
+        listener.events = []
+        self.mapper.select_one("SELECT id FROM users WHERE id = :id", {"id": self.alice_id})
+        self.assertEqual(listener.events, [])
+
+    def test_listener_event_carries_phase_timings(self):
+        events = []
+
+        class TimingListener(StatementListener):
+            def after_mapping(self, event):
+                events.append(event)
+
+        self.mapper.add_listener(TimingListener())
+        self.mapper.select_one("SELECT id, name FROM users WHERE id = :id", {"id": self.alice_id}, UserResult)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].rows, 1)
+        self.assertEqual(events[0].fetch_count, 1)
+        self.assertGreaterEqual(events[0].execute_time, 0.0)
+        self.assertGreaterEqual(events[0].fetch_time, 0.0)
+        self.assertGreaterEqual(events[0].mapping_time, 0.0)
+
+    def test_result_cache_serves_repeated_reads_until_a_write_invalidates_the_table(self):
+        self.mapper.result_cache = ResultCache(ttl=None)
+        sql = "SELECT id, name FROM users WHERE status = :status ORDER BY id"
+        first = list(self.mapper.select_all(sql, {"status": "active"}, cache=True))
+        second = list(self.mapper.select_all(sql, {"status": "active"}, result_type=UserResult, cache=True))
+        self.assertEqual([row.name for row in first], ["Alice", "Bob"])
+        self.assertEqual([row.name for row in second], ["Alice", "Bob"])
+        self.assertIsInstance(second[0], UserResult)
+        self.assertEqual(self.mapper.result_cache.hits, 1)
+
+        self.mapper.update("UPDATE departments SET name = :name WHERE id = 1", {"name": "Marketing"})
+        self.assertEqual(len(list(self.mapper.select_all(sql, {"status": "active"}, cache=True))), 2)
+        self.assertEqual(self.mapper.result_cache.hits, 2)
+
+        self.mapper.update(
+            "UPDATE users SET status = :status WHERE id = :id",
+            {"id": self.bob_id, "status": "inactive"},
+        )
+        self.assertEqual([row.name for row in self.mapper.select_all(sql, {"status": "active"}, cache=True)], ["Alice"])
+        self.assertEqual(self.mapper.result_cache.hits, 2)
+
+        self.mapper.rollback()
+        self.assertEqual(len(list(self.mapper.select_all(sql, {"status": "active"}, cache=True))), 2)
+        self.assertEqual(self.mapper.result_cache.hits, 2)
+
+    def test_result_cache_supports_declared_tags_ttl_and_shared_invalidation(self):
+        cache = ResultCache(ttl=None)
+        self.mapper.result_cache = cache
+        sql = "SELECT id, name FROM users WHERE id = :id"
+        self.assertEqual(self.mapper.select_one(sql, {"id": self.alice_id}, cache=("people",)).name, "Alice")
+        self.assertIsNone(self.mapper.select_one(sql, {"id": 999999}, cache=True))
+        self.assertIsNone(self.mapper.select_one(sql, {"id": 999999}, cache=True))
+        self.assertEqual(cache.hits, 1)
+
+        with Mapper(sqlite3, database=self.db_path, result_cache=cache) as other:
+            other.execute("CREATE TABLE people (id INTEGER)")
+            other.execute("CREATE INDEX users_status ON users (status)")
+        self.assertEqual(len(cache), 0)
+
+        expiring = ResultCache(ttl=0)
+        self.mapper.result_cache = expiring
+        self.mapper.select_one(sql, {"id": self.alice_id}, cache=True)
+        self.mapper.select_one(sql, {"id": self.alice_id}, cache=True)
+        self.assertEqual(expiring.hits, 0)
+        self.assertEqual(expiring.misses, 2)
+
+    def test_shared_result_cache_never_serves_uncommitted_rows(self):
+        cache = ResultCache(ttl=None)
+        sql = "SELECT name FROM users WHERE id = :id"
+        with Mapper(sqlite3, database=self.db_path, result_cache=cache) as writer, Mapper(
+            sqlite3, database=self.db_path, result_cache=cache
+        ) as reader:
+            writer.update("UPDATE users SET name = :name WHERE id = :id", {"id": self.alice_id, "name": "uncommitted"})
+            self.assertEqual(writer.select_one(sql, {"id": self.alice_id}, cache=True).name, "uncommitted")
+            self.assertEqual(len(cache), 0)
+            self.assertEqual(reader.select_one(sql, {"id": self.alice_id}, cache=True).name, "Alice")
+            self.assertEqual(writer.select_one(sql, {"id": self.alice_id}, cache=True).name, "uncommitted")
+            writer.select_one("SELECT name FROM departments WHERE id = :id", {"id": 1}, cache=True)
+            self.assertEqual(len(cache), 2)
+            writer.rollback()
+            self.assertEqual(len(cache), 1)
+            self.assertEqual(writer.select_one(sql, {"id": self.alice_id}, cache=True).name, "Alice")
+            self.assertEqual(cache.hits, 0)
+            self.assertEqual(reader.select_one(sql, {"id": self.alice_id}, cache=True).name, "Alice")
+            self.assertEqual(cache.hits, 1)
+
+    def test_result_cache_evicts_by_size_and_memory(self):
+        cache = ResultCache(max_size=1, ttl=None)
+        self.mapper.result_cache = cache
+        self.mapper.select_one("SELECT id FROM users WHERE id = :id", {"id": self.alice_id}, cache=True)
+        self.mapper.select_one("SELECT id FROM users WHERE id = :id", {"id": self.bob_id}, cache=True)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.evictions, 1)
+
+        cache = ResultCache(max_bytes=10, ttl=None)
+        self.mapper.result_cache = cache
+        self.assertEqual(len(list(self.mapper.select_all("SELECT id, name FROM users", cache=True))), 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_select_all_closes_cursor_when_generator_is_abandoned(self):
+        rows = self.mapper.select_all("SELECT id, name FROM users ORDER BY id", array_size=1, buffered=False)
+        self.assertEqual(next(rows).name, "Alice")
+        rows.close()
+        self.mapper.update(
+            "UPDATE users SET status = :status WHERE id = :id",
+            {"id": self.bob_id, "status": "inactive"},
+        )
+        self.mapper.commit()
+        bob = self.mapper.select_one("SELECT status FROM users WHERE id = :id", {"id": self.bob_id})
+        self.assertEqual(bob.status, "inactive")
+
     def test_select_one_with_result_type_and_join_alias_dynamic_result(self):
         user = self.mapper.select_one(
             "SELECT id, name FROM users WHERE id = :id",
@@ -219,6 +490,244 @@ class TestSQLite3Mapper(unittest.TestCase):
         self.assertEqual(rows[0].user_name, "Alice")
         self.assertEqual(rows[0].dept_name, "Sales")
 
+    def test_select_all_hydrates_slots_properties_and_dataclasses(self):
+        for result_type in (UserResult, SlotUserResult, PropertyUserResult, DataclassUserResult):
+            rows = list(
+                self.mapper.select_all(
+                    "SELECT id, name FROM users ORDER BY id",
+                    result_type=result_type,
+                    array_size=10,
+                )
+            )
+            self.assertTrue(all(isinstance(row, result_type) for row in rows))
+            self.assertEqual([row.id for row in rows], [self.alice_id, self.bob_id])
+        self.assertEqual([row.name for row in rows], ["Alice", "Bob"])
+
+        upper = self.mapper.select_one(
+            "SELECT id, name FROM users WHERE id = :id",
+            {"id": self.alice_id},
+            result_type=PropertyUserResult,
+        )
+        self.assertEqual(upper.name, "ALICE")
+
+    def test_result_type_accepts_factories_that_are_not_classes(self):
+        def make_user():
+            return UserResult()
+
+        for result_type in (make_user, functools.partial(DataclassUserResult, None), functools.partial(SlotUserResult)):
+            user = self.mapper.select_one(
+                "SELECT id, name FROM users WHERE id = :id", {"id": self.alice_id}, result_type=result_type
+            )
+            self.assertEqual((user.id, user.name), (self.alice_id, "Alice"))
+
+    def test_dataclasses_with_custom_init_are_hydrated_through_attributes(self):
+        for result_type in (NoInitDataclassUserResult, CustomInitDataclassUserResult):
+            rows = list(self.mapper.select_all("SELECT id, name FROM users ORDER BY id", result_type=result_type))
+            self.assertTrue(all(row.loaded for row in rows))
+            self.assertEqual([(row.id, row.name) for row in rows], [(self.alice_id, "Alice"), (self.bob_id, "Bob")])
+
+    def test_dynamic_results_use_generated_slot_classes(self):
+        users = list(self.mapper.select_all("SELECT id, name FROM users ORDER BY id"))
+        self.assertTrue(all(isinstance(user, Result) for user in users))
+        self.assertIs(type(users[0]), type(users[1]))
+        self.assertFalse(hasattr(users[0], "__dict__"))
+        self.assertEqual([(user.id, user.name) for user in users], [(self.alice_id, "Alice"), (self.bob_id, "Bob")])
+        copied = pickle.loads(pickle.dumps(users[1]))
+        self.assertEqual((copied.id, copied.name), (self.bob_id, "Bob"))
+
+        count = self.mapper.select_one("SELECT COUNT(*) FROM users")
+        self.assertIsInstance(count, Result)
+        self.assertEqual(getattr(count, "COUNT(*)"), 2)
+
+    def test_lazy_results_convert_only_accessed_columns(self):
+        calls = []
+
+        def upper(value):
+            calls.append(value)
+            return value.upper()
+
+        class LazyUser(LazyResult):
+            converters = {"name": upper, "note": upper}
+
+        users = list(
+            self.mapper.select_all("SELECT id, name, NULL AS note FROM users ORDER BY id", result_type=LazyUser)
+        )
+        self.assertTrue(all(isinstance(user, LazyUser) for user in users))
+        self.assertEqual([user.id for user in users], [self.alice_id, self.bob_id])
+        self.assertEqual(calls, [])
+        self.assertEqual(users[0].name, "ALICE")
+        self.assertEqual(users[0].name, "ALICE")
+        self.assertEqual(calls, ["Alice"])
+        self.assertIsNone(users[0].note)
+        with self.assertRaises(AttributeError):
+            users[0].status
+        self.assertEqual(users[1].name, "BOB")
+
+        row = self.mapper.select_one("SELECT COUNT(*) AS count FROM users", result_type=LazyResult)
+        self.assertEqual(pickle.loads(pickle.dumps(row)).count, 2)
+
+    def test_select_scalar_and_select_column_return_raw_values(self):
+        self.assertEqual(self.mapper.select_scalar("SELECT COUNT(*) FROM users"), 2)
+        self.assertEqual(self.mapper.select_scalar("SELECT name FROM users WHERE id = :id", {"id": self.bob_id}), "Bob")
+        self.assertIsNone(self.mapper.select_scalar("SELECT name FROM users WHERE id = :id", {"id": -1}))
+        with self.assertRaises(MappingError):
+            self.mapper.select_scalar("SELECT id FROM users")
+        with self.assertRaises(MappingError):
+            self.mapper.select_scalar("SELECT id, name FROM users WHERE id = :id", {"id": self.bob_id})
+
+        self.assertEqual(
+            list(self.mapper.select_column("SELECT name FROM users ORDER BY id", array_size=1)), ["Alice", "Bob"]
+        )
+        self.assertEqual(
+            list(self.mapper.select_column("SELECT id FROM users ORDER BY id", buffered=False, chunked=True)),
+            [[self.alice_id, self.bob_id]],
+        )
+        self.assertEqual(list(self.mapper.select_column("SELECT id FROM users WHERE id < 0")), [])
+        with self.assertRaises(MappingError):
+            list(self.mapper.select_column("SELECT id, name FROM users"))
+        with self.assertRaises(DriverOperationalError):
+            self.mapper.select_scalar("SELECT missing FROM users")
+        alice = self.mapper.select_one("SELECT id, name FROM users WHERE id = :id", {"id": self.alice_id})
+        self.assertEqual(alice.name, "Alice")
+
+    def test_select_nested_assembles_collections_and_associations(self):
+        empty_id = self.mapper.insert("INSERT INTO departments (name) VALUES (:name)", {"name": "Empty"})
+        carol_id = self.mapper.insert(
+            "INSERT INTO users (name, status, department_id) SELECT 'Carol', 'active', department_id "
+            "FROM users WHERE id = :id",
+            {"id": self.alice_id},
+        )
+        result_map = ResultMap(
+            key="id",
+            collections={
+                "users": ResultMap(
+                    UserResult,
+                    prefix="user_",
+                    associations={"account": ResultMap(prefix="account_")},
+                )
+            },
+        )
+        sql = """
+            SELECT d.id, d.name, u.id AS user_id, u.name AS user_name, a.id AS user_account_id,
+                   a.balance AS user_account_balance
+            FROM departments d
+            LEFT JOIN users u ON u.department_id = d.id
+            LEFT JOIN accounts a ON a.id = u.id
+            ORDER BY d.id, u.id
+        """
+        balance = self.mapper.select_scalar("SELECT balance FROM accounts WHERE id = :id", {"id": self.alice_id})
+        for ordered in (False, True):
+            departments = list(self.mapper.select_nested(sql, None, result_map, ordered=ordered, array_size=2))
+            self.assertEqual([department.name for department in departments], ["Sales", "Engineering", "Empty"])
+            self.assertEqual(departments[2].id, empty_id)
+            self.assertEqual([user.id for user in departments[0].users], [self.alice_id, carol_id])
+            self.assertTrue(all(isinstance(user, UserResult) for user in departments[0].users))
+            self.assertEqual(departments[0].users[0].account.balance, balance)
+            self.assertIsNone(departments[0].users[1].account)
+            self.assertEqual([user.name for user in departments[1].users], ["Bob"])
+            self.assertEqual(departments[2].users, [])
+
+        with self.assertRaises(MappingError):
+            list(self.mapper.select_nested("SELECT name FROM departments", None, ResultMap()))
+        with self.assertRaises(MappingError):
+            list(self.mapper.select_nested(sql, None, ResultMap(collections={"users": ResultMap()})))
+
+    def test_key_loader_batches_and_memoizes_lookups(self):
+        loader = KeyLoader(self.mapper, "SELECT id, name FROM users WHERE id IN (:keys*)", result_type=UserResult)
+        for key in (self.alice_id, self.bob_id, -1, self.alice_id):
+            loader.add(key)
+        loader.flush()
+        self.assertEqual(loader.batches, 1)
+        self.assertEqual(loader.get(self.bob_id).name, "Bob")
+        self.assertIsNone(loader.get(-1))
+        self.assertEqual(loader.batches, 1)
+        self.assertEqual([user.name for user in loader.get_many([self.alice_id, self.bob_id])], ["Alice", "Bob"])
+        self.assertEqual(loader.batches, 1)
+        loader.clear()
+        self.assertEqual(loader.get(self.alice_id).name, "Alice")
+        self.assertEqual(loader.batches, 2)
+
+        small = KeyLoader(self.mapper, "SELECT id FROM users WHERE id IN (:keys*)", max_batch_size=1)
+        users = small.get_many([self.alice_id, self.bob_id])
+        self.assertEqual([user.id for user in users], [self.alice_id, self.bob_id])
+        self.assertEqual(small.batches, 2)
+
+        by_status = KeyLoader(
+            self.mapper,
+            "SELECT id, status FROM users WHERE status IN (:keys*) AND id >= :min_id ORDER BY id",
+            key="status",
+            parameter={"min_id": 0},
+            many=True,
+        )
+        active, inactive = by_status.get_many(["active", "inactive"])
+        self.assertEqual([user.id for user in active], [self.alice_id, self.bob_id])
+        self.assertEqual(inactive, [])
+        with self.assertRaises(MappingError):
+            KeyLoader(self.mapper, "SELECT id, status FROM users WHERE status IN (:keys*)", key="status").get("active")
+
+        bounded = KeyLoader(
+            self.mapper,
+            "SELECT id, name FROM users WHERE id IN (:keys*) AND id BETWEEN :min_id AND :max_id",
+            parameter=UserQuery(min_id=0, max_id=self.alice_id, status="active"),
+        )
+        alice, bob = bounded.get_many([self.alice_id, self.bob_id])
+        self.assertEqual(alice.name, "Alice")
+        self.assertIsNone(bob)
+
+    def test_transaction_runner_replays_on_lock_contention(self):
+        self.mapper.commit()
+        attempts = []
+        release_after = [2]
+
+        def withdraw(mapper, amount):
+            attempts.append(amount)
+            if len(attempts) == release_after[0]:
+                blocker.rollback()
+            return mapper.update("UPDATE accounts SET balance = balance - :amount WHERE id = 1", {"amount": amount})
+
+        blocker = Mapper(sqlite3, database=self.db_path)
+        mapper = Mapper(sqlite3, database=self.db_path, timeout=0)
+        try:
+            runner = TransactionRunner(mapper, max_attempts=3, base_delay=0)
+            blocker.update("UPDATE accounts SET balance = 0 WHERE id = 2")
+            self.assertEqual(runner.run(withdraw, 100), 1)
+            self.assertEqual(len(attempts), 2)
+            self.assertEqual(mapper.select_scalar("SELECT balance FROM accounts WHERE id = 1"), 4900)
+
+            blocker.update("UPDATE accounts SET balance = 0 WHERE id = 2")
+            attempts.clear()
+            release_after[0] = None
+            with self.assertRaises(DriverOperationalError):
+                runner.run(withdraw, 100)
+            self.assertEqual(len(attempts), 3)
+            blocker.rollback()
+
+            with self.assertRaises(DriverOperationalError):
+                runner.run(lambda mapper: mapper.update("UPDATE missing SET value = 1"))
+            stats = runner.stats()
+        finally:
+            mapper.close()
+            blocker.close()
+        self.assertEqual(stats["runs"], 3)
+        self.assertEqual(stats["attempts"], 6)
+        self.assertEqual(stats["retries"], 3)
+        self.assertEqual(stats["successes"], 1)
+        self.assertEqual(stats["failures"], 2)
+        self.assertEqual(stats["exhausted"], 1)
+        self.assertEqual(stats["retry_rate"], 0.5)
+
+    def test_select_all_raises_mapping_error_only_when_rows_are_returned(self):
+        rows = list(
+            self.mapper.select_all(
+                "SELECT id, status FROM users WHERE id = :id",
+                {"id": 999999},
+                result_type=UserResult,
+            )
+        )
+        self.assertEqual(rows, [])
+        with self.assertRaises(MappingError):
+            list(self.mapper.select_all("SELECT id, status FROM users", result_type=SlotUserResult))
+
     def test_select_one_returns_none_when_no_rows(self):
         row = self.mapper.select_one(
             "SELECT id, name FROM users WHERE id = :id",
@@ -319,6 +828,98 @@ class TestSQLite3Mapper(unittest.TestCase):
         self.assertEqual(deleted_bob, 0)
         self.assertEqual(deleted_alice, 1)
 
+    def test_insert_many_update_many_and_delete_many_return_total_rowcount(self):
+        inserted = self.mapper.insert_many(
+            "INSERT INTO users (name, status) VALUES (:name, :status)",
+            [NewUser(name="User{0}".format(index), status="batch") for index in range(5)],
+            batch_size=2,
+        )
+        updated = self.mapper.update_many(
+            "UPDATE users SET status = :status WHERE name = :name",
+            ({"name": "User{0}".format(index), "status": "done"} for index in range(3)),
+            batch_size=2,
+        )
+        deleted = self.mapper.delete_many(
+            "DELETE FROM users WHERE status = :status",
+            [{"status": "done"}, {"status": "batch"}],
+        )
+        self.mapper.commit()
+        self.assertEqual(inserted, 5)
+        self.assertEqual(updated, 3)
+        self.assertEqual(deleted, 5)
+
+    def test_insert_many_raises_mapping_error_when_bind_variable_missing(self):
+        with self.assertRaises(MappingError):
+            self.mapper.insert_many(
+                "INSERT INTO users (name, status) VALUES (:name, :status)",
+                [{"name": "Carol", "status": "active"}, {"name": "Dave"}],
+            )
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_select_columns_returns_numpy_arrays_per_column(self):
+        self.mapper.insert_many(
+            "INSERT INTO users (name, status, department_id) VALUES (:name, :status, :department_id)",
+            [
+                {"name": "User{0}".format(index), "status": "batch", "department_id": None if index == 2 else index}
+                for index in range(5)
+            ],
+        )
+        columns = self.mapper.select_columns(
+            "SELECT id, name, department_id, id * 0.5 AS half FROM users ORDER BY id",
+            array_size=3,
+        )
+        self.assertEqual(list(columns), ["id", "name", "department_id", "half"])
+        self.assertEqual(columns["id"].dtype, numpy.int64)
+        self.assertEqual(columns["half"].dtype, numpy.float64)
+        self.assertEqual(columns["name"].dtype, object)
+        self.assertEqual(len(columns["id"]), 7)
+        self.assertEqual(columns["name"][0], "Alice")
+        self.assertEqual(columns["department_id"].dtype, object)
+        self.assertIsNone(columns["department_id"][4])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_select_columns_promotes_dtype_when_later_chunks_change_type(self):
+        sqlite3.register_converter(
+            "SQLMAPPER_FLAG", lambda value: value == b"1" if value in (b"0", b"1") else int(value)
+        )
+        self.mapper.execute("CREATE TABLE readings (id INTEGER PRIMARY KEY, amount NUMERIC, flag SQLMAPPER_FLAG, code)")
+        self.mapper.insert_many(
+            "INSERT INTO readings (id, amount, flag, code) VALUES (:id, :amount, :flag, :code)",
+            [{"id": index, "amount": 2.0, "flag": True, "code": 1} for index in range(10)]
+            + [
+                {"id": 10, "amount": 10.5, "flag": 5, "code": 2**60},
+                {"id": 11, "amount": 1, "flag": False, "code": 0.5},
+            ],
+        )
+        self.mapper.commit()
+        sql = "SELECT amount, flag, code FROM readings ORDER BY id"
+        params = dict(self.MAPPER_PARAMS, detect_types=sqlite3.PARSE_DECLTYPES)
+        with Mapper(sqlite3, database=self.db_path, **params) as mapper:
+            columns = mapper.select_columns(sql, array_size=10)
+            rows = list(mapper.select_all(sql))
+        self.assertEqual(columns["amount"].dtype, numpy.float64)
+        self.assertEqual(columns["amount"].tolist(), [row.amount for row in rows])
+        self.assertEqual(columns["amount"][10], 10.5)
+        self.assertEqual(columns["flag"].dtype, object)
+        self.assertEqual(columns["flag"].tolist(), [row.flag for row in rows])
+        self.assertEqual(columns["flag"][10], 5)
+        self.assertEqual(columns["code"].dtype, object)
+        self.assertEqual(columns["code"].tolist(), [row.code for row in rows])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_select_columns_accepts_dtypes_and_returns_structured_array(self):
+        result = self.mapper.select_columns(
+            "SELECT id, used_flag FROM users WHERE status = :status ORDER BY id",
+            {"status": "active"},
+            dtypes={"used_flag": bool},
+            structured=True,
+        )
+        self.assertEqual(result.dtype.names, ("id", "used_flag"))
+        self.assertEqual(result["used_flag"].tolist(), [False, True])
+
+        empty = self.mapper.select_columns("SELECT id FROM users WHERE id = :id", {"id": 999999})
+        self.assertEqual(len(empty["id"]), 0)
+
     def test_execute_can_run_special_sql(self):
         self.mapper.execute("ALTER TABLE users ADD COLUMN profile TEXT")
         self.mapper.commit()
@@ -389,6 +990,522 @@ class TestSQLite3Mapper(unittest.TestCase):
             )
         self.assertEqual(user.status, "active")
 
+    def test_statement_cache_reuses_compiled_statements_and_evicts_oldest(self):
+        self.mapper.statement_cache = LRUCache(max_size=2)
+        for _ in range(3):
+            user = self.mapper.select_one("SELECT id, name FROM users WHERE id = :id", {"id": self.alice_id})
+            self.assertEqual(user.name, "Alice")
+        self.assertEqual(self.mapper.statement_cache.misses, 1)
+        self.assertEqual(self.mapper.statement_cache.hits, 2)
+
+        self.mapper.select_one("SELECT id FROM users WHERE name = :name", {"name": "Bob"})
+        self.mapper.select_one(
+            "SELECT id FROM users WHERE status = :status AND id = :id", {"status": "active", "id": self.bob_id}
+        )
+        self.assertEqual(len(self.mapper.statement_cache), 2)
+        self.assertEqual(self.mapper.statement_cache.evictions, 1)
+
+    def test_statement_cache_keeps_bind_variable_error_messages(self):
+        with self.assertRaisesRegex(MappingError, "Bind variable 'status' was not found in parameter object"):
+            self.mapper.select_one(
+                "SELECT id, name FROM users WHERE id = :id AND status = :status",
+                UserDeleteParam(self.alice_id),
+            )
+
+    def test_select_pages_walks_keyset_pages_and_resumes_from_checkpoint(self):
+        self.mapper.insert_many(
+            "INSERT INTO users (name, status) VALUES (:name, :status)",
+            [{"name": f"User{index}", "status": "batch"} for index in range(23)],
+        )
+        checkpoint = PageCheckpoint()
+        pages = self.mapper.select_pages(
+            "SELECT id, name FROM users WHERE status = :status",
+            UserQuery(min_id=0, max_id=0, status="batch"),
+            page_size=10,
+            checkpoint=checkpoint,
+        )
+        first = next(pages)
+        self.assertEqual([user.name for user in first], [f"User{index}" for index in range(10)])
+        self.assertIsNone(checkpoint.last_key)
+        next(pages)
+        pages.close()
+        self.assertEqual((checkpoint.last_key, checkpoint.pages, checkpoint.rows), ((first[-1].id,), 1, 10))
+
+        resumed = self.mapper.select_pages(
+            "SELECT id, name FROM users WHERE status = :status",
+            {"status": "batch"},
+            page_size=10,
+            checkpoint=PageCheckpoint(list(checkpoint.last_key)),
+        )
+        names = [user.name for page in resumed for user in page]
+        self.assertEqual(names, [f"User{index}" for index in range(10, 23)])
+
+        resumed = self.mapper.select_pages(
+            "SELECT id, name FROM users WHERE status = :status",
+            {"status": "batch"},
+            page_size=10,
+            checkpoint=PageCheckpoint(last_key=first[-1].id),
+        )
+        names = [user.name for page in resumed for user in page]
+        self.assertEqual(names, [f"User{index}" for index in range(10, 23)])
+
+    def test_select_pages_supports_composite_keys_and_adaptive_page_size(self):
+        self.mapper.insert_many(
+            "INSERT INTO users (name, status) VALUES (:name, :status)",
+            [{"name": f"User{index}", "status": "ab"[index % 2]} for index in range(40)],
+        )
+        self.mapper.initial_page_size = 2
+        self.mapper.page_time_target = 60.0
+        checkpoint = PageCheckpoint()
+        pages = list(
+            self.mapper.select_pages(
+                "SELECT id, name, status FROM users",
+                key=("status", "id"),
+                page_size="auto",
+                checkpoint=checkpoint,
+            )
+        )
+        users = [user for page in pages for user in page]
+        self.assertEqual([len(page) for page in pages], [2, 4, 8, 16, 12])
+        self.assertEqual([(user.status, user.id) for user in users], sorted((user.status, user.id) for user in users))
+        self.assertEqual(len(users), 42)
+        self.assertEqual((checkpoint.pages, checkpoint.rows, checkpoint.page_size), (5, 42, 32))
+
+    def test_list_bind_variable_expands_to_power_of_two_placeholders(self):
+        cases = [
+            ([self.alice_id], ["Alice"]),
+            ([self.alice_id, self.bob_id, 0], ["Alice", "Bob"]),
+            ((self.bob_id, 0, -1, -2), ["Bob"]),
+            ([self.bob_id] * 5, ["Bob"]),
+        ]
+        statements = []
+        self.mapper.connection.set_trace_callback(statements.append)
+        try:
+            for ids, names in cases:
+                users = self.mapper.select_all(
+                    "SELECT name FROM users WHERE id IN (:ids*) AND status = :status ORDER BY id",
+                    {"ids": ids, "status": "active"},
+                )
+                self.assertEqual([user.name for user in users], names)
+        finally:
+            self.mapper.connection.set_trace_callback(None)
+        lengths = [statement.split("IN (")[1].split(")")[0].count(",") + 1 for statement in statements]
+        self.assertEqual(lengths, [1, 4, 4, 8])
+
+    def test_list_bind_variable_rejects_empty_sequence(self):
+        with self.assertRaisesRegex(MappingError, "Bind variable 'ids' is bound to an empty sequence"):
+            self.mapper.select_one("SELECT name FROM users WHERE id IN (:ids*)", {"ids": []})
+
+    def test_only_list_bind_variables_marked_with_star_expand(self):
+        statement = Statement("SELECT :a*:b, :c * 2, :d*2, :f* :g FROM t WHERE id IN (:ids*) OR x IN (:e*, 1)", "?")
+        self.assertEqual(statement.names, ("a", "b", "c", "d", "f", "g", "ids", "e"))
+        self.assertEqual(statement.expanded, (False, False, False, False, False, False, True, True))
+        self.assertEqual(statement.sql, "SELECT ?*?, ? * 2, ?*2, ?* ? FROM t WHERE id IN (?) OR x IN (?, 1)")
+        row = self.mapper.select_one(
+            "SELECT :price*:quantity AS total, :price * 2 AS twice, :price* :quantity AS spaced",
+            {"price": 3, "quantity": 4},
+        )
+        self.assertEqual((row.total, row.twice, row.spaced), (12, 6, 12))
+        with self.assertRaisesRegex(MappingError, "Bind variable 'ids\\*' must be bound to a list or tuple"):
+            self.mapper.select_one("SELECT name FROM users WHERE id IN (:ids*)", {"ids": self.alice_id})
+        with self.assertRaisesRegex(DriverProgrammingError, "type 'list' is not supported"):
+            self.mapper.select_one("SELECT name FROM users WHERE id IN (:ids)", {"ids": [self.alice_id]})
+        with self.assertRaisesRegex(MappingError, "not supported by update_many"):
+            self.mapper.update_many(
+                "UPDATE users SET status = :status WHERE id IN (:ids*)", [{"ids": [1], "status": "x"}]
+            )
+
+    def test_copy_in_and_copy_out_raise_mapping_error_for_sqlite3(self):
+        with self.assertRaisesRegex(MappingError, "COPY is not supported for driver 'sqlite3'"):
+            self.mapper.copy_in("users", ["name", "status"], [{"name": "Carol", "status": "active"}])
+        with self.assertRaisesRegex(MappingError, "COPY is not supported for driver 'sqlite3'"):
+            list(self.mapper.copy_out("SELECT id, name FROM users"))
+
+    def test_unsupported_driver_lists_registered_dialects(self):
+        with self.assertRaisesRegex(
+            MappingError,
+            r"Unsupported driver 'nodb'\. Supported drivers: sqlite3, mysql\.connector, MySQLdb, pymysql, psycopg2, "
+            "psycopg",
+        ):
+            Mapper(types.ModuleType("nodb"))
+
+    def test_registered_dialect_supplies_driver_behavior(self):
+        batches = []
+
+        @Dialect.register
+        class TracingDialect(SQLite3Dialect):
+            driver_name = "tracing_sqlite3"
+
+            def executemany(self, cursor, sql, batch):
+                batches.append(len(batch))
+                super().executemany(cursor, sql, batch)
+
+        driver = types.ModuleType("tracing_sqlite3")
+        vars(driver).update((name, value) for name, value in vars(sqlite3).items() if not name.startswith("__"))
+        with Mapper(driver, database=self.db_path, **self.MAPPER_PARAMS) as mapper:
+            self.assertIsInstance(mapper.dialect, TracingDialect)
+            rowcount = mapper.insert_many(
+                "INSERT INTO departments (name) VALUES (:name)", [{"name": f"D{index}"} for index in range(3)], 2
+            )
+            departments = list(mapper.select_all("SELECT name FROM departments WHERE name LIKE 'D%' ORDER BY name"))
+            with self.assertRaises(DriverOperationalError):
+                mapper.execute("SELECT * FROM missing_table")
+        self.assertEqual(rowcount, 3)
+        self.assertEqual(batches, [2, 1])
+        self.assertEqual([department.name for department in departments], ["D0", "D1", "D2"])
+
+    def test_prepared_cursor_params_are_used_only_in_prepared_mode(self):
+        class PreparedCursor(sqlite3.Cursor):
+            pass
+
+        @Dialect.register
+        class PreparedCursorDialect(SQLite3Dialect):
+            driver_name = "prepared_cursor_sqlite3"
+            prepared_mode = "cursor"
+
+            def __init__(self, driver, tuple_rows):
+                super().__init__(driver, tuple_rows)
+                self.prepared_cursor_params = {"factory": PreparedCursor}
+
+        driver = types.ModuleType("prepared_cursor_sqlite3")
+        vars(driver).update((name, value) for name, value in vars(sqlite3).items() if not name.startswith("__"))
+        for prepared in (False, True):
+            with Mapper(
+                driver, database=self.db_path, factory=CountingConnection, **dict(self.MAPPER_PARAMS, prepared=prepared)
+            ) as mapper:
+                mapper.update("UPDATE users SET status = :status WHERE id = :id", {"id": self.bob_id, "status": "x"})
+                mapper.select_one("SELECT id FROM users WHERE id = :id", {"id": self.bob_id})
+                cursors = mapper.connection.cursors
+                stats = mapper.prepared_stats()
+            self.assertEqual([isinstance(cursor, PreparedCursor) for cursor in cursors], [prepared] * len(cursors))
+            self.assertEqual(stats["misses"], 2 if prepared else 0)
+
+
+class TestSQLite3MapperWithTupleRows(TestSQLite3Mapper):
+    MAPPER_PARAMS = {"tuple_rows": True}
+
+    def test_connection_keeps_plain_tuple_rows(self):
+        cursor = self.mapper.connection.cursor()
+        try:
+            cursor.execute("SELECT id, name FROM users WHERE id = ?", (self.alice_id,))
+            self.assertEqual(cursor.fetchone(), (self.alice_id, "Alice"))
+        finally:
+            cursor.close()
+
+    def test_select_all_maps_duplicate_column_names_like_dict_rows(self):
+        row = self.mapper.select_one("SELECT 1 AS value, 2 AS value")
+        self.assertEqual(row.value, 2)
+
+
+class TestSQLite3MapperWithPreparedStatements(TestSQLite3Mapper):
+    MAPPER_PARAMS = {"prepared": True}
+
+    def test_connection_sizes_statement_cache_to_max_prepared_statements(self):
+        mapper = Mapper(sqlite3, database=self.db_path, prepared=True, cached_statements=8)
+        try:
+            self.assertEqual(mapper.select_one("SELECT COUNT(*) AS count FROM users").count, 2)
+        finally:
+            mapper.close()
+
+    def test_prepared_stats_count_hits_misses_and_evictions(self):
+        mapper = Mapper(sqlite3, database=self.db_path, prepared=True)
+        mapper.max_prepared_statements = 2
+        for _ in range(3):
+            user = mapper.select_one("SELECT name FROM users WHERE id = :id", {"id": self.alice_id})
+            self.assertEqual(user.name, "Alice")
+        mapper.select_one("SELECT id FROM users WHERE name = :name", {"name": "Bob"})
+        mapper.select_one("SELECT id FROM users WHERE status = :status AND id = :id", {"status": "x", "id": 0})
+        mapper.execute("CREATE INDEX users_status ON users (status)")
+        self.assertEqual(mapper.prepared_stats(), {"hits": 2, "misses": 3, "evictions": 1, "size": 2, "max_size": 2})
+
+        mapper.close()
+        self.assertEqual(mapper.prepared_stats()["size"], 0)
+
+
+class TestSQLite3MapperWithCursorReuse(TestSQLite3Mapper):
+    MAPPER_PARAMS = {"reuse_cursors": True}
+
+    def test_write_loop_and_select_one_share_one_cursor(self):
+        with Mapper(sqlite3, database=self.db_path, reuse_cursors=True, factory=CountingConnection) as mapper:
+            for index in range(3):
+                mapper.insert(
+                    "INSERT INTO users (name, status, department_id) VALUES (:name, 'active', NULL)",
+                    {"name": f"User{index}"},
+                )
+            mapper.update("UPDATE users SET status = 'inactive' WHERE name = :name", {"name": "User0"})
+            user = mapper.select_one("SELECT status FROM users WHERE name = :name", {"name": "User0"})
+            mapper.execute("DELETE FROM users WHERE name LIKE 'User%'")
+            self.assertEqual(user.status, "inactive")
+            self.assertEqual(len(mapper.connection.cursors), 1)
+
+    def test_open_select_all_generator_keeps_its_own_cursor(self):
+        with Mapper(sqlite3, database=self.db_path, reuse_cursors=True, factory=CountingConnection) as mapper:
+            rows = mapper.select_all("SELECT id, name FROM users ORDER BY id", array_size=1, buffered=False)
+            self.assertEqual(next(rows).name, "Alice")
+            bob = mapper.select_one("SELECT name FROM users WHERE id = :id", {"id": self.bob_id})
+            self.assertEqual(next(rows).name, "Bob")
+            rows.close()
+            mapper.select_one("SELECT name FROM users WHERE id = :id", {"id": self.alice_id})
+            self.assertEqual(bob.name, "Bob")
+            self.assertEqual(len(mapper.connection.cursors), 2)
+
+    def test_buffered_selects_share_their_own_cached_cursor(self):
+        with Mapper(sqlite3, database=self.db_path, reuse_cursors=True, factory=CountingConnection) as mapper:
+            for index in range(3):
+                mapper.insert("INSERT INTO users (name, status) VALUES (:name, 'active')", {"name": f"User{index}"})
+                users = list(mapper.select_all("SELECT id FROM users WHERE name = :name", {"name": f"User{index}"}))
+                self.assertEqual(len(users), 1)
+            self.assertEqual(len(mapper.connection.cursors), 2)
+            rows = mapper.select_all("SELECT id, name FROM users ORDER BY id")
+            self.assertEqual(next(rows).name, "Alice")
+            self.assertEqual(len(list(mapper.select_all("SELECT id FROM users"))), 5)
+            rows.close()
+            self.assertEqual(len(mapper.connection.cursors), 3)
+
+
+class TestSQLite3MapperPool(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory(prefix="psm_sqlite3_pool_")
+        self.db_path = os.path.join(self.tempdir.name, "pool.db")
+        with Mapper(sqlite3, database=self.db_path) as mapper:
+            mapper.execute("CREATE TABLE counters (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)")
+            mapper.insert("INSERT INTO counters (id, value) VALUES (1, 0)")
+            mapper.commit()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def create_pool(self, **options):
+        return MapperPool(sqlite3, database=self.db_path, check_same_thread=False, **options)
+
+    def test_session_reuses_idle_connection_and_rolls_back_on_return(self):
+        with self.create_pool(min_size=1, max_size=2) as pool:
+            with pool.session() as mapper:
+                first = mapper
+                mapper.update("UPDATE counters SET value = 10 WHERE id = 1")
+            with pool.session() as mapper:
+                self.assertIs(mapper, first)
+                self.assertEqual(mapper.select_one("SELECT value FROM counters WHERE id = 1").value, 0)
+            stats = pool.stats()
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["in_use"], 0)
+
+    def test_session_times_out_when_pool_is_exhausted(self):
+        with self.create_pool(min_size=0, max_size=1, timeout=0.05) as pool:
+            with pool.session():
+                with self.assertRaises(PoolTimeoutError):
+                    with pool.session():
+                        pass
+                self.assertEqual(pool.stats()["utilization"], 1.0)
+            self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_session_blocks_until_connection_is_returned(self):
+        with self.create_pool(min_size=0, max_size=2) as pool:
+
+            def work():
+                for _ in range(10):
+                    with pool.session() as mapper:
+                        mapper.update("UPDATE counters SET value = value + 1 WHERE id = 1")
+                        mapper.commit()
+
+            threads = [threading.Thread(target=work) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            with pool.session() as mapper:
+                self.assertEqual(mapper.select_one("SELECT value FROM counters WHERE id = 1").value, 40)
+            stats = pool.stats()
+        self.assertLessEqual(stats["created"], 2)
+        self.assertEqual(stats["checkouts"], 41)
+
+    def test_session_replaces_over_aged_and_invalid_connections(self):
+        with self.create_pool(min_size=1, max_size=1, max_lifetime=0) as pool:
+            with pool.session() as mapper:
+                first = mapper
+            with pool.session() as mapper:
+                self.assertIsNot(mapper, first)
+
+        with self.create_pool(min_size=1, max_size=1) as pool:
+            with pool.session() as mapper:
+                broken = mapper
+            broken.connection.close()
+            with pool.session() as mapper:
+                self.assertIsNot(mapper, broken)
+                self.assertEqual(mapper.select_one("SELECT value FROM counters WHERE id = 1").value, 0)
+            self.assertEqual(pool.stats()["discarded"], 1)
+
+    def test_session_raises_mapping_error_after_close(self):
+        pool = self.create_pool()
+        pool.close()
+        with self.assertRaises(MappingError):
+            with pool.session():
+                pass
+
+    def create_items(self, count):
+        with Mapper(sqlite3, database=self.db_path) as mapper:
+            mapper.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)")
+            mapper.insert_many(
+                "INSERT INTO items (id, value) VALUES (:id, :value)",
+                ({"id": index, "value": index * 10} for index in range(1, count + 1)),
+            )
+            mapper.commit()
+
+    def test_select_parallel_scans_every_partition(self):
+        self.create_items(100)
+        with self.create_pool(min_size=0, max_size=4) as pool:
+            for partition_by in ("modulo", "range"):
+                unordered = list(
+                    pool.select_parallel(
+                        "SELECT id, value FROM items WHERE value >= :low",
+                        {"low": 200},
+                        partitions=4,
+                        partition_by=partition_by,
+                        array_size=7,
+                        max_chunks=1,
+                    )
+                )
+                self.assertEqual(sorted(item.id for item in unordered), list(range(20, 101)))
+                ordered = list(
+                    pool.select_parallel(
+                        "SELECT id, value FROM items", partitions=3, ordered=True, partition_by=partition_by
+                    )
+                )
+                self.assertEqual([item.id for item in ordered], list(range(1, 101)))
+                self.assertEqual(ordered[9].value, 100)
+            self.assertEqual(pool.stats()["in_use"], 0)
+            self.assertEqual(list(pool.select_parallel("SELECT id FROM items WHERE id < 0", partition_by="range")), [])
+
+    def test_select_parallel_validates_arguments(self):
+        self.create_items(10)
+        with self.create_pool(min_size=0, max_size=2) as pool:
+            with self.assertRaises(MappingError):
+                list(pool.select_parallel("SELECT id FROM items", partitions=3))
+            with self.assertRaises(MappingError):
+                list(pool.select_parallel("SELECT id FROM items", partitions=2, partition_by="hash"))
+            with self.assertRaises(MappingError):
+                list(pool.select_parallel("SELECT 'a' || id AS id FROM items", partitions=2, partition_by="range"))
+
+    def test_select_parallel_failure_cancels_other_partitions(self):
+        self.create_items(1000)
+
+        class Item(object):
+            id = None
+
+            def __setattr__(self, name, value):
+                if name == "id" and value == 501:
+                    raise ValueError("broken row")
+                object.__setattr__(self, name, value)
+
+        with self.create_pool(min_size=0, max_size=4) as pool:
+            with self.assertRaises(ValueError):
+                for _ in pool.select_parallel(
+                    "SELECT id FROM items", partitions=4, result_type=Item, array_size=1, max_chunks=1
+                ):
+                    pass
+            self.assertEqual(pool.stats()["in_use"], 0)
+
+    def test_select_parallel_stops_workers_when_closed_early(self):
+        self.create_items(1000)
+        with self.create_pool(min_size=0, max_size=4) as pool:
+            results = pool.select_parallel("SELECT id FROM items", partitions=4, array_size=10, max_chunks=1)
+            self.assertEqual(len([next(results) for _ in range(5)]), 5)
+            results.close()
+            self.assertEqual(pool.stats()["in_use"], 0)
+            with pool.session() as mapper:
+                self.assertEqual(mapper.select_one("SELECT COUNT(*) AS count FROM items").count, 1000)
+
+
+class TestSQLite3AsyncMapper(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tempdir = tempfile.TemporaryDirectory(prefix="psm_sqlite3_async_")
+        self.db_path = os.path.join(self.tempdir.name, "async.db")
+        self.mapper = AsyncMapper(sqlite3, database=self.db_path)
+        await self.mapper.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL)")
+        await self.mapper.commit()
+
+    async def asyncTearDown(self):
+        await self.mapper.close()
+        self.tempdir.cleanup()
+
+    async def test_operations_run_in_submission_order(self):
+        ids = await asyncio.gather(
+            *[
+                self.mapper.insert("INSERT INTO users (name) VALUES (:name)", {"name": "User{0}".format(index)})
+                for index in range(10)
+            ]
+        )
+        await self.mapper.commit()
+        self.assertEqual(ids, list(range(1, 11)))
+
+        names = [
+            user.name
+            async for user in self.mapper.select_all("SELECT id, name FROM users ORDER BY id", array_size=3)
+        ]
+        self.assertEqual(names, ["User{0}".format(index) for index in range(10)])
+
+    async def test_calls_after_close_raise_mapping_error(self):
+        await self.mapper.insert_many("INSERT INTO users (name) VALUES (:name)", [{"name": "Alice"}, {"name": "Bob"}])
+        users = self.mapper.select_all("SELECT id, name FROM users ORDER BY id")
+        self.assertEqual((await users.__anext__()).name, "Alice")
+        await self.mapper.close()
+        await users.aclose()
+        with self.assertRaisesRegex(MappingError, "AsyncMapper is closed"):
+            await self.mapper.select_one("SELECT id FROM users")
+        with self.assertRaisesRegex(MappingError, "AsyncMapper is closed"):
+            [user async for user in self.mapper.select_all("SELECT id FROM users")]
+        await self.mapper.close()
+
+    async def test_select_one_update_and_rollback_match_sync_mapper(self):
+        user_id = await self.mapper.insert("INSERT INTO users (name) VALUES (:name)", {"name": "Alice"})
+        await self.mapper.commit()
+        updated = await self.mapper.update(
+            "UPDATE users SET name = :name WHERE id = :id",
+            {"id": user_id, "name": "Bob"},
+        )
+        await self.mapper.rollback()
+        user = await self.mapper.select_one("SELECT id, name FROM users WHERE id = :id", {"id": user_id})
+        self.assertEqual(updated, 1)
+        self.assertEqual(user.name, "Alice")
+        with self.assertRaises(MappingError):
+            await self.mapper.select_one("SELECT id FROM users WHERE id = :id")
+
+    async def test_select_scalar_and_select_column(self):
+        await self.mapper.insert_many("INSERT INTO users (name) VALUES (:name)", [{"name": "A"}, {"name": "B"}])
+        self.assertEqual(await self.mapper.select_scalar("SELECT COUNT(*) FROM users"), 2)
+        names = [name async for name in self.mapper.select_column("SELECT name FROM users ORDER BY id", array_size=1)]
+        self.assertEqual(names, ["A", "B"])
+        chunks = [chunk async for chunk in self.mapper.select_column("SELECT id FROM users ORDER BY id", chunked=True)]
+        self.assertEqual(chunks, [[1, 2]])
+
+    async def test_key_loader_coalesces_concurrent_loads(self):
+        await self.mapper.insert_many("INSERT INTO users (name) VALUES (:name)", [{"name": "A"}, {"name": "B"}])
+        loader = KeyLoader(self.mapper, "SELECT id, name FROM users WHERE id IN (:keys*)")
+        users = await asyncio.gather(loader.load(1), loader.load(2), loader.load(3), loader.load(1))
+        self.assertEqual([user and user.name for user in users], ["A", "B", None, "A"])
+        self.assertEqual(loader.batches, 1)
+        self.assertEqual([user.name for user in await loader.load_many([2, 1])], ["B", "A"])
+        self.assertEqual(loader.batches, 1)
+        with self.assertRaises(MappingError):
+            loader.flush()
+
+    async def test_cancelled_query_leaves_connection_usable(self):
+        task = asyncio.ensure_future(
+            self.mapper.select_one(
+                """
+                WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < 1000000000)
+                SELECT MAX(x) AS x FROM counter
+                """
+            )
+        )
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        row = await self.mapper.select_one("SELECT COUNT(*) AS count FROM users")
+        self.assertEqual(row.count, 0)
+
 
 if __name__ == "__main__":
     unittest.main()